@@ -1,10 +1,154 @@
+import bisect
+import concurrent.futures
+import functools
+import hashlib
+import json
+import mmap
 import os
+import queue
+import re
+import sys
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, ttk
-from PIL import Image, ImageTk
+
+from explorer_model import (ExplorerModel, FilePreviewer, ReadmeIndex, ReadmeWriter, cache_directory,
+                            create_watcher, natural_sort_key, profiler, sort_entries)
+
+
+class IconRegistry:
+    """
+    Registry of the tree icons, with one shared `PhotoImage` per icon type.
+
+    Every icon type is a source PNG recolored to a single color: white for folders and
+    plain files, and an accent color per file category. Processed icons are cached on disk,
+    keyed by a hash of the source image, the color and the size, and later loaded
+    straight into Tk without PIL, so PIL is only imported when an icon has to be rendered.
+    Types are only loaded the first time they are requested.
+    """
+
+    ICON_TYPES = {
+        'folder': ('folder-icon.png', '#ffffff'),
+        'file': ('file-icon.png', '#ffffff'),
+        'code': ('file-icon.png', '#7aa2f7'),
+        'image': ('file-icon.png', '#bb9af7'),
+        'data': ('file-icon.png', '#9ece6a'),
+        'archive': ('file-icon.png', '#e0af68'),
+        'document': ('file-icon.png', '#7dcfff'),
+    }
+
+    EXTENSIONS = {
+        **dict.fromkeys(['.py', '.ipynb', '.r', '.m', '.jl', '.js', '.ts', '.c', '.h', '.cpp', '.hpp',
+                         '.java', '.go', '.rs', '.sh', '.sql', '.html', '.css'], 'code'),
+        **dict.fromkeys(['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tif', '.tiff', '.svg', '.webp'], 'image'),
+        **dict.fromkeys(['.csv', '.tsv', '.json', '.xml', '.yaml', '.yml', '.xlsx', '.xls', '.parquet',
+                         '.h5', '.hdf5', '.mat', '.npy', '.npz', '.sqlite', '.db'], 'data'),
+        **dict.fromkeys(['.zip', '.tar', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar'], 'archive'),
+        **dict.fromkeys(['.md', '.txt', '.pdf', '.doc', '.docx', '.rst', '.tex'], 'document'),
+    }
+
+    def __init__(self, icon_dir, size=16, cache_dir=None):
+        self.icon_dir = icon_dir
+        self.size = size
+        self.cache_dir = cache_directory(cache_dir, 'icons')
+        self.images = {}
+
+    def get(self, icon_type):
+        """
+        Returns the shared image of an icon type, loading it on first use.
+
+        Args:
+            icon_type (str): A key of `ICON_TYPES`.
+
+        Returns:
+            tk.PhotoImage: The icon image.
+        """
+        image = self.images.get(icon_type)
+        if image is None:
+            image = self.images[icon_type] = self.load(*self.ICON_TYPES[icon_type])
+        return image
+
+    def for_name(self, name):
+        """
+        Returns the icon for a file name, chosen by its extension.
+
+        Args:
+            name (str): The file name.
+
+        Returns:
+            tk.PhotoImage: The icon image.
+        """
+        return self.get(self.EXTENSIONS.get(os.path.splitext(name)[1].lower(), 'file'))
+
+    def load(self, source_name, color):
+        """
+        Loads a recolored icon from the disk cache, rendering and caching it on a miss.
+
+        Args:
+            source_name (str): The file name of the source PNG in `icon_dir`.
+            color (str): The target color as '#rrggbb'.
+
+        Returns:
+            tk.PhotoImage: The icon image.
+        """
+        source_path = os.path.join(self.icon_dir, source_name)
+        with open(source_path, 'rb') as file:
+            digest = hashlib.sha1(file.read())
+        digest.update(f'{color}:{self.size}'.encode('ascii'))
+        cache_path = os.path.join(self.cache_dir, digest.hexdigest() + '.png')
+        if os.path.exists(cache_path):
+            try:
+                return tk.PhotoImage(file=cache_path)
+            except tk.TclError:
+                pass
+
+        from PIL import Image, ImageTk
+        icon = self.recolor(Image.open(source_path).resize((self.size, self.size), Image.LANCZOS), color)
+        try:
+            icon.save(cache_path)
+        except OSError:
+            pass
+        return ImageTk.PhotoImage(icon)
+
+    @staticmethod
+    def recolor(icon, color):
+        """
+        Paints every pixel of an image in one color while keeping its transparency.
+
+        Works on whole channels instead of individual pixels: a solid image of the target
+        color receives the alpha channel of the source.
+
+        Args:
+            icon (PIL.Image.Image): The source image.
+            color (str): The target color as '#rrggbb'.
+
+        Returns:
+            PIL.Image.Image: The recolored RGBA image.
+        """
+        from PIL import Image
+        icon = icon.convert("RGBA")
+        recolored = Image.new("RGBA", icon.size, color)
+        recolored.putalpha(icon.getchannel("A"))
+        return recolored
+
 
 class FileExplorer:
-    def __init__(self, root):
+    # Line patterns of the Markdown view mode, see `tag_markdown_line`
+    MARKDOWN_FENCE = re.compile(r'\s{0,3}(```|~~~)')
+    MARKDOWN_HEADING = re.compile(r'\s{0,3}(#{1,6})\s')
+    MARKDOWN_QUOTE = re.compile(r'\s{0,3}>')
+    MARKDOWN_LIST = re.compile(r'\s*([-*+]|\d+[.)])\s')
+    MARKDOWN_INLINE = [
+        ('md_code', re.compile(r'`[^`]+`')),
+        ('md_link', re.compile(r'\[[^\]]*\]\([^)]*\)|<https?://[^>]+>')),
+        ('md_bold', re.compile(r'(\*\*|__)(?=\S).+?(?<=\S)\1')),
+        ('md_italic', re.compile(r'(?<![*_\w])([*_])(?=[^\s*_]).+?(?<=[^\s*_])\1(?![*_\w])')),
+    ]
+    MARKDOWN_TAGS = ('md_h1', 'md_h2', 'md_h3', 'md_quote', 'md_list', 'md_codeblock', 'md_open',
+                     'md_code', 'md_link', 'md_bold', 'md_italic')
+
+    def __init__(self, root, folder_path=None):
         self.root = root
         self.root.title("Simple File Explorer")
         self.root.geometry("1200x600")
@@ -18,23 +162,135 @@ class FileExplorer:
         # Initialize current paths
         self.current_folder_path = ""
         self.current_readme_path = ""
+        self.model = None
+        self.watcher = None
+        self.doc_search_job = None
+        self.doc_results_active = False
+        self.loaded_dirs = {}
+        self.item_paths = {}
+        self.result_paths = {}
+        self.search_job = None
+        self.search_active = False
+        self.search_generation = 0
+        self.max_search_results = 1000
+        self.page_state = {}
+        self.insert_chunk_size = 500
+        self.page_size = 5000
+        self.select_job = None
+        self.select_generation = 0
+        self.select_delay = 150
 
         # Create main frame
         self.main_frame = ttk.Frame(root, padding="8")
         self.main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         # Create and configure modern dark theme styling
-        self.setup_styles()
+        self.colors = self.setup_styles()
 
-        # Load icons
-        self.load_icons()
+        # Icons are loaded after the first frame is drawn, see `finish_startup`
+        self.icons = IconRegistry(os.path.dirname(os.path.abspath(__file__)))
+        self.folder_icon = ''
+        self.file_icon = ''
 
         # Create three panels
         self.create_panels()
 
+        # Set up background metadata computation
+        self.metadata_queue = queue.Queue()
+        self.metadata_generation = 0
+        self.metadata_poll_interval = 100
+        self.metadata_shown = None
+        self.metadata_outdated = False
+        self.poll_metadata_queue()
+
+        # Set up file previews, generated on worker threads
+        self.previewer = FilePreviewer()
+        self.preview_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='preview')
+        self.prefetch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+        self.prefetching = set()
+        self.preview_queue = queue.Queue()
+        self.preview_generation = 0
+        self.preview_prefetch = 8
+        self.preview_image = None
+        self.preview_poll_interval = 50
+        self.poll_preview_queue()
+
+        # Set up filesystem change watching
+        self.watch_queue = queue.Queue()
+        self.watch_poll_interval = 500
+        self.poll_watch_queue()
+
+        # Set up folder listings, scanned and sorted on worker threads
+        self.listing_queue = queue.Queue()
+        self.listing_poll_interval = 20
+        self.poll_listing_queue()
+
         # Set up auto-save
-        self.auto_save_interval = 4000
-        self.auto_save()
+        self.auto_save_delay = 1000
+        self.auto_save_job = None
+        self.readme_saved_hash = None
+        self.readme_pending_hash = None
+        self.readme_window = None
+        self.readme_loading = False
+        self.large_readme_size = 1024 * 1024
+        self.readonly_readme_size = 32 * 1024 * 1024
+        self.readme_chunk_size = 256 * 1024
+        self.readme_writer = ReadmeWriter(on_written=self.on_readme_written, on_failed=self.on_readme_failed)
+        self.readme_save_queue = queue.Queue()
+        self.readme_save_poll_interval = 100
+        self.poll_readme_save_queue()
+
+        # Set up incremental Markdown styling of the README
+        self.markdown_ranges = []
+        self.markdown_job = None
+        self.markdown_lines = 0
+        self.markdown_batch = 200
+        self.readme_text.bind('<<Modified>>', self.on_readme_modified)
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
+
+        # Set up the duplicate finder panel
+        self.duplicates_window = None
+        self.duplicates_queue = queue.Queue()
+        self.duplicates_generation = 0
+        self.duplicate_keys = []
+        self.duplicate_paths = {}
+
+        # Set up the performance panel, toggled with F12
+        self.profiler_window = None
+        self.profiler_text = None
+        self.heartbeat_interval = 50
+        self.heartbeat_due = None
+        self.heartbeat_job = None
+        self.profiler_refresh_job = None
+        self.root.bind('<F12>', lambda event: self.toggle_profiler_panel())
+
+        # Defer everything not needed for the first frame
+        self.startup_folder = folder_path
+        self.session_path = os.path.join(cache_directory(), 'session.json')
+        self.snapshot_limit = 20000
+        self.pending_readme_scroll = None
+        self.root.after(10, self.finish_startup)
+
+    def finish_startup(self):
+        """
+        Completes startup once the window has been drawn.
+
+        Loads the icons and opens the folder passed on the command line or, failing that,
+        the folder that was open when the application was last closed. If that folder is
+        the one of the last session, the session is restored, see `restore_tree`.
+        """
+        self.load_icons()
+        try:
+            with open(self.session_path, 'r', encoding='utf-8') as file:
+                session = json.load(file)
+        except (OSError, ValueError):
+            session = {}
+        self.markdown_var.set(bool(session.get('markdown')))
+        folder_path = self.startup_folder or session.get('root')
+        if folder_path and os.path.isdir(folder_path):
+            if os.path.normpath(os.path.abspath(folder_path)) != session.get('root'):
+                session = None
+            self.open_root(folder_path, session)
 
     def center_window(self):
         """
@@ -126,56 +382,59 @@ class FileExplorer:
             arrowcolor=colors['text'],
             troughcolor=colors['bg_medium'])
 
+        # Configure search entry style
+        self.style.configure('TEntry',
+            fieldbackground=colors['bg_medium'],
+            foreground=colors['text'],
+            insertcolor=colors['text'],
+            bordercolor=colors['border'],
+            lightcolor=colors['border'],
+            darkcolor=colors['border'])
+
+        # Configure checkbutton style
+        self.style.configure('TCheckbutton',
+            background=colors['bg_dark'],
+            foreground=colors['text'],
+            font=('Helvetica', 10))
+        self.style.map('TCheckbutton',
+            background=[('active', colors['bg_dark'])],
+            indicatorcolor=[('selected', colors['accent']), ('!selected', colors['bg_light'])])
+
+        # Configure status label style
+        self.style.configure('Status.TLabel',
+            background=colors['bg_dark'],
+            foreground=colors['text_dim'],
+            font=('Helvetica', 9))
+
         return colors
 
     def load_icons(self):
         """
-        Load and process icons for the file explorer.
+        Load the icons for the file explorer.
 
-        This method performs the following steps:
-        1. Determines the directory of the current script.
-        2. Loads PNG icons for folders and files from the script directory.
-        3. Resizes the icons to 16x16 pixels using the LANCZOS filter.
-        4. Converts the icons to white using the `convert_to_white` method.
+        Icons are served by the `IconRegistry` over the PNG files in the script directory,
+        which recolors them once and caches the results on disk. Folders and plain files
+        use the white icons; other file types are loaded on first use by `icon_for`.
 
         Attributes:
-            folder_icon (PIL.Image.Image): The processed folder icon.
-            file_icon (PIL.Image.Image): The processed file icon.
+            folder_icon (tk.PhotoImage): The folder icon.
+            file_icon (tk.PhotoImage): The plain file icon.
         """
-        # Get the directory of the current script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-
-        # Load PNG icons
-        folder_icon_path = os.path.join(script_dir, "folder-icon.png")
-        file_icon_path = os.path.join(script_dir, "file-icon.png")
-        folder_icon = Image.open(folder_icon_path).resize((16, 16), Image.LANCZOS)
-        file_icon = Image.open(file_icon_path).resize((16, 16), Image.LANCZOS)
+        self.folder_icon = self.icons.get('folder')
+        self.file_icon = self.icons.get('file')
 
-        # Convert icons to white
-        self.folder_icon = self.convert_to_white(folder_icon)
-        self.file_icon = self.convert_to_white(file_icon)
-
-    def convert_to_white(self, icon):
+    def icon_for(self, name, is_dir):
         """
-        Converts all non-transparent pixels of an image to white.
+        Returns the tree icon for an entry.
 
         Args:
-            icon (PIL.Image): The image to be converted.
+            name (str): The file or directory name.
+            is_dir (bool): Whether the entry is a directory.
 
         Returns:
-            ImageTk.PhotoImage: The converted image with all non-transparent pixels changed to white.
+            tk.PhotoImage: The shared icon image.
         """
-        icon = icon.convert("RGBA")
-        data = icon.getdata()
-        new_data = []
-        for item in data:
-            # Change all non-transparent pixels to white
-            if item[3] > 0:  # Check if pixel is not transparent
-                new_data.append((255, 255, 255, item[3]))  # Change to white
-            else:
-                new_data.append(item)
-        icon.putdata(new_data)
-        return ImageTk.PhotoImage(icon)
+        return self.folder_icon if is_dir else self.icons.for_name(name)
 
     def create_panels(self):
         """
@@ -188,14 +447,27 @@ class FileExplorer:
         Returns:
             None
         """
-        colors = self.setup_styles()
+        colors = self.colors
 
         # Left Panel: File Explorer
         self.explorer_frame = ttk.LabelFrame(self.main_frame, text="Explorer", padding=(5, 5, 5, 5), width=400)
         self.explorer_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
 
-        self.open_button = ttk.Button(self.explorer_frame, text="Open Folder", command=self.open_folder)
-        self.open_button.pack(pady=(5, 10))
+        button_frame = ttk.Frame(self.explorer_frame)
+        button_frame.pack(pady=(5, 10))
+        self.open_button = ttk.Button(button_frame, text="Open Folder", command=self.open_folder)
+        self.open_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.duplicates_button = ttk.Button(button_frame, text="Find Duplicates", command=self.find_duplicates)
+        self.duplicates_button.pack(side=tk.LEFT)
+
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', self.on_search_changed)
+        self.search_entry = ttk.Entry(self.explorer_frame, textvariable=self.search_var, font=('Helvetica', 10))
+        self.search_entry.pack(fill=tk.X, pady=(0, 5))
+        self.search_entry.bind('<Escape>', lambda event: self.search_var.set(''))
+
+        self.status_label = ttk.Label(self.explorer_frame, text='', style='Status.TLabel')
+        self.status_label.pack(fill=tk.X, pady=(0, 5))
 
         # Create a frame for the treeview and scrollbar
         tree_frame = ttk.Frame(self.explorer_frame)
@@ -205,14 +477,20 @@ class FileExplorer:
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         # Add scrollbar to treeview
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.configure(yscrollcommand=self.tree_scrollbar.set)
         
         self.tree.bind('<<TreeviewSelect>>', self.on_file_select)
+        self.tree.bind('<<TreeviewOpen>>', self.on_tree_open)
+
+        # Search results replace the tree while a search is active
+        self.results_tree = ttk.Treeview(tree_frame, show='tree')
+        self.results_tree.bind('<<TreeviewSelect>>', self.on_result_select)
 
         # Add right-click context menu
         self.tree.bind("<Button-2>", self.show_context_menu)
+        self.results_tree.bind("<Button-2>", self.show_context_menu)
         self.context_menu = tk.Menu(self.tree, tearoff=0)
         self.context_menu.add_command(label="Open with ...", command=self.open_file)
 
@@ -220,6 +498,18 @@ class FileExplorer:
         self.readme_frame = ttk.LabelFrame(self.main_frame, text="Documentation", padding=(5, 5, 5, 5), width=500)
         self.readme_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
 
+        doc_bar = ttk.Frame(self.readme_frame)
+        doc_bar.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        self.doc_search_var = tk.StringVar()
+        self.doc_search_var.trace_add('write', self.on_doc_search_changed)
+        self.doc_search_entry = ttk.Entry(doc_bar, textvariable=self.doc_search_var, font=('Helvetica', 10))
+        self.doc_search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.markdown_var = tk.BooleanVar(value=False)
+        self.markdown_button = ttk.Checkbutton(doc_bar, text="Markdown", variable=self.markdown_var,
+                                               command=self.on_markdown_toggled)
+        self.markdown_button.pack(side=tk.RIGHT, padx=(5, 0))
+        self.doc_search_entry.bind('<Escape>', lambda event: self.doc_search_var.set(''))
+
         # Create text widget with custom colors and scrollbar
         self.readme_text = tk.Text(self.readme_frame, 
             wrap=tk.WORD,
@@ -237,9 +527,27 @@ class FileExplorer:
             borderwidth=0)
         self.readme_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        readme_scrollbar = ttk.Scrollbar(self.readme_frame, orient="vertical", command=self.readme_text.yview)
-        readme_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.readme_text.configure(yscrollcommand=readme_scrollbar.set)
+        self.readme_scrollbar = ttk.Scrollbar(self.readme_frame, orient="vertical", command=self.readme_text.yview)
+        self.readme_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.readme_text.configure(yscrollcommand=self.on_readme_scroll)
+
+        # Documentation search results are shown in the same text widget
+        self.readme_text.tag_configure('doc_title', foreground=colors['accent'], underline=True)
+        self.readme_text.tag_configure('doc_snippet', foreground=colors['text_dim'])
+        self.readme_text.tag_bind('doc_title', '<Enter>', lambda event: self.readme_text.configure(cursor='hand2'))
+        self.readme_text.tag_bind('doc_title', '<Leave>', lambda event: self.readme_text.configure(cursor='xterm'))
+
+        # Markdown view mode styles
+        self.readme_text.tag_configure('md_h1', font=('Courier', 20, 'bold'), foreground=colors['accent'])
+        self.readme_text.tag_configure('md_h2', font=('Courier', 17, 'bold'), foreground=colors['accent'])
+        self.readme_text.tag_configure('md_h3', font=('Courier', 14, 'bold'), foreground=colors['accent'])
+        self.readme_text.tag_configure('md_quote', foreground=colors['text_dim'])
+        self.readme_text.tag_configure('md_list', foreground=colors['accent'])
+        self.readme_text.tag_configure('md_codeblock', background=colors['bg_light'])
+        self.readme_text.tag_configure('md_code', background=colors['bg_light'])
+        self.readme_text.tag_configure('md_link', foreground=colors['accent'], underline=True)
+        self.readme_text.tag_configure('md_bold', font=('Courier', 13, 'bold'))
+        self.readme_text.tag_configure('md_italic', font=('Courier', 13, 'italic'))
 
         # Right Panel: Metadata
         self.metadata_frame = ttk.LabelFrame(self.main_frame, text="Metadata", padding=(5, 5, 5, 5), width=300)
@@ -262,33 +570,79 @@ class FileExplorer:
         metadata_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.metadata_text.configure(yscrollcommand=metadata_scrollbar.set)
 
+        # File previews show text content in a monospace font
+        self.metadata_text.tag_configure('preview_text', font=('Courier', 11))
+
     def open_folder(self):
         """
         Opens a folder selection dialog for the user to choose a directory.
-        
-        If a folder is selected, updates the current root path and current folder path,
-        populates the tree view with the contents of the selected folder, updates the
-        metadata, and displays the README file if present.
-        
+
+        If a folder is selected, it is opened with `open_root`.
+
         Uses:
             - filedialog.askdirectory(): To open the folder selection dialog.
+            - self.open_root(folder_path): To open the selected folder.
+        """
+        folder_path = filedialog.askdirectory()
+        if folder_path:
+            self.open_root(folder_path)
+
+    def open_root(self, folder_path, session=None):
+        """
+        Makes the given folder the root of the explorer.
+
+        Updates the current root path and current folder path, opens an `ExplorerModel`
+        for it, starts a directory watcher and the background build of the model's search
+        indexes, populates the tree view with the
+        contents of the folder, updates the metadata, and displays the README file if present.
+        The folder is remembered so that it is reopened on the next launch.
+
+        Args:
+            folder_path (str): The folder to open.
+            session (dict, optional): The state saved by `save_session` for this folder. Its
+                                      tree snapshot is shown instead of a fresh listing.
+
+        Uses:
             - os.path.dirname(): To get the directory name of the selected folder.
             - os.path.relpath(): To get the relative path of the selected folder.
             - self.populate_tree(folder_path): To populate the tree view with folder contents.
             - self.update_metadata(folder_path): To update the metadata of the selected folder.
             - self.display_readme(folder_path): To display the README file if it exists.
         """
-        folder_path = filedialog.askdirectory()
-        if folder_path:
-            self.current_root_path = os.path.dirname(folder_path)
-            self.current_folder_path = os.path.relpath(folder_path, self.current_root_path)
+        folder_path = os.path.normpath(os.path.abspath(folder_path))
+        self.select_generation += 1
+        if self.duplicates_window is not None:
+            self.close_duplicates_panel()
+        self.current_root_path = os.path.dirname(folder_path)
+        self.current_folder_path = os.path.relpath(folder_path, self.current_root_path)
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.model is not None:
+            self.model.close()
+        self.model = ExplorerModel(folder_path)
+        self.watcher = create_watcher(functools.partial(self.on_fs_changes, self.model))
+        self.watcher.start()
+        threading.Thread(target=self.model.build_search_indexes, daemon=True).start()
+        self.search_var.set('')
+        self.doc_search_var.set('')
+        restored = False
+        if session and '.' in session.get('snapshot', {}):
+            restored = self.restore_tree(folder_path, session)
+        else:
             self.populate_tree(folder_path)
+        if not restored:
             self.update_metadata(folder_path)
             self.display_readme(folder_path)
+        try:
+            ReadmeWriter.write_atomic(self.session_path, json.dumps({'root': folder_path}))
+        except OSError:
+            pass
 
     def populate_tree(self, folder_path):
         """
-        Populates the tree view with the directory structure starting from the given folder path.
+        Populates the tree view with the top level of the given folder path.
+
+        Subfolders are only listed once they are expanded, see `on_tree_open`.
 
         Args:
             folder_path (str): The path of the folder to populate the tree view with.
@@ -296,13 +650,171 @@ class FileExplorer:
         Returns:
             None
         """
-        self.tree.delete(*self.tree.get_children())
-        root_node = self.tree.insert('', 'end', text='   ' + os.path.basename(folder_path), open=True, image=self.folder_icon)
+        root_node = self.clear_tree(folder_path)
         self.insert_items(root_node, folder_path)
 
+    def clear_tree(self, folder_path):
+        """
+        Empties the tree view and inserts the node of a new root folder.
+
+        Args:
+            folder_path (str): The path of the new root folder.
+
+        Returns:
+            str: The identifier of the root node.
+        """
+        for state in self.page_state.values():
+            if state['job'] is not None:
+                self.root.after_cancel(state['job'])
+        self.page_state = {}
+        self.status_label.configure(text='')
+        self.tree.delete(*self.tree.get_children())
+        self.loaded_dirs = {}
+        self.item_paths = {}
+        root_node = self.tree.insert('', 'end', text='   ' + os.path.basename(folder_path), open=True, image=self.folder_icon, tags=('dir',))
+        self.item_paths[root_node] = os.path.normpath(folder_path)
+        return root_node
+
+    def restore_tree(self, folder_path, session):
+        """
+        Shows the tree of the last session from its snapshot, then reconciles it with the disk.
+
+        The snapshot lists the nodes that were materialized in every loaded folder; they are
+        inserted right away, without touching the disk. Expanded folders, the selection and
+        the scroll positions are restored as well. A worker thread then validates every
+        loaded folder through the `DirectoryIndex`, and `apply_fs_changes` patches in only
+        what differs. Folders that were paged keep a paging node, which the reconciliation
+        fills with the remaining entries.
+
+        Args:
+            folder_path (str): The root folder, matching the session's root.
+            session (dict): The state saved by `save_session`.
+
+        Returns:
+            bool: Whether a selection was restored. If not, the caller shows the root folder.
+        """
+        with profiler.span('tree.restore', 'ui'):
+            root_node = self.clear_tree(folder_path)
+            snapshot = session['snapshot']
+            expanded = set(session.get('expanded', []))
+            paged = set(session.get('paged', []))
+            nodes = {'.': root_node}
+            stack = ['.']
+            while stack:
+                relative = stack.pop()
+                node = nodes[relative]
+                path = self.item_paths[node]
+                self.tree.delete(*self.tree.get_children(node))
+                for name in snapshot[relative]:
+                    is_dir = name.endswith('/')
+                    name = name.rstrip('/')
+                    child = self.insert_item(node, name, is_dir)
+                    if is_dir:
+                        child_relative = os.path.normpath(os.path.join(relative, name))
+                        nodes[child_relative] = child
+                        if child_relative in snapshot:
+                            stack.append(child_relative)
+                if relative in paged:
+                    self.page_state[node] = {'entries': [], 'offset': 0, 'page_end': 0, 'job': None, 'dirty': False,
+                                             'more': self.tree.insert(node, 'end', text='   Show next entries...',
+                                                                      tags=('more',))}
+                self.tree.item(node, open=relative in expanded or node == root_node)
+                self.loaded_dirs[path] = node
+                self.watcher.watch(path)
+            profiler.count('nodes_inserted', len(self.item_paths))
+
+        worker = threading.Thread(target=self.reconcile_tree, args=(self.model, list(self.loaded_dirs)), daemon=True)
+        worker.start()
+
+        scroll = session.get('scroll', 0.0)
+        self.root.after_idle(lambda: self.tree.yview_moveto(scroll))
+        selection = session.get('selection')
+        if not selection or selection == '.':
+            return False
+        selected_path = os.path.normpath(os.path.join(folder_path, selection))
+        selected = nodes.get(selection) or next(
+            (node for node, path in self.item_paths.items() if path == selected_path), None)
+        if selected is None:
+            return False
+        self.pending_readme_scroll = (self.item_paths[selected], session.get('readme_scroll', 0.0))
+        self.tree.selection_set(selected)
+        self.tree.focus(selected)
+        return True
+
+    def reconcile_tree(self, model, paths):
+        """
+        Lists the folders of a restored tree on a worker thread and posts them for patching.
+
+        The listings are posted to `watch_queue` like a batch of filesystem changes, so that
+        `apply_fs_changes` patches the differences into the tree.
+
+        Args:
+            model (ExplorerModel): The model of the restored root.
+            paths (list): The loaded folders of the restored tree.
+        """
+        listings = {}
+        for path in paths:
+            if model.closed:
+                return
+            entries = model.index.scan(path)
+            listings[path] = None if entries is None else sort_entries(entries)
+        self.watch_queue.put((model, listings, []))
+
+    def save_session(self):
+        """
+        Writes the state of the tree to the session file, to be restored by `restore_tree`.
+
+        Besides the root, the session holds the selection, the scroll positions of the tree
+        and the documentation, the expanded folders and a snapshot of the materialized
+        nodes of every loaded folder. Folder names end with a slash. The snapshot is capped
+        at `snapshot_limit` nodes; folders beyond it are restored collapsed.
+        """
+        if self.model is None:
+            return
+        root_path = self.model.root_path
+        snapshot = {}
+        expanded = []
+        paged = []
+        total = 0
+        for path, node in sorted(self.loaded_dirs.items()):
+            relative = os.path.relpath(path, root_path)
+            if not self.tree.exists(node) or (relative != '.' and (os.path.dirname(relative) or '.') not in snapshot):
+                continue
+            children = [os.path.basename(self.item_paths[child]) + ('/' if self.tree.tag_has('dir', child) else '')
+                        for child in self.tree.get_children(node) if child in self.item_paths]
+            if total + len(children) > self.snapshot_limit:
+                continue
+            total += len(children)
+            snapshot[relative] = children
+            if self.tree.item(node, 'open'):
+                expanded.append(relative)
+            if node in self.page_state:
+                paged.append(relative)
+
+        session = {'root': root_path, 'snapshot': snapshot, 'expanded': expanded, 'paged': paged,
+                   'scroll': self.tree.yview()[0], 'readme_scroll': self.readme_text.yview()[0],
+                   'markdown': self.markdown_var.get()}
+        selection = self.tree.selection()
+        if selection and selection[0] in self.item_paths:
+            session['selection'] = os.path.relpath(self.item_paths[selection[0]], root_path)
+        try:
+            ReadmeWriter.write_atomic(self.session_path, json.dumps(session, separators=(',', ':')))
+        except OSError:
+            pass
+
     def insert_items(self, parent, path):
         """
-        Recursively inserts items from the given directory path into the tree view widget.
+        Inserts the direct children of the given directory path into the tree view widget.
+
+        The listing comes from `ExplorerModel.list_dir` on a worker thread, see `list_folder`,
+        so unchanged directories are not rescanned and the window stays responsive while large
+        folders are scanned and sorted. Entries are sorted with folders first and natural order
+        within each group. `poll_listing_queue` inserts them in chunks of `insert_chunk_size`
+        scheduled with `root.after`, so the window stays responsive. At most `page_size`
+        entries are materialized at once; the rest are reachable through a "Show next
+        entries" node at the end of the folder. Directories receive a placeholder child so
+        that they can be expanded; their contents are listed only when the node is opened.
+        The directory is registered in `loaded_dirs` and watched for changes from then on.
 
         Args:
             parent (str): The parent node in the tree view where items will be inserted.
@@ -311,15 +823,325 @@ class FileExplorer:
         Returns:
             None
         """
-        for item in os.listdir(path):
-            if item == '.DS_Store':
+        path = os.path.normpath(path)
+        self.loaded_dirs[path] = parent
+        self.watcher.watch(path)
+        self.page_state[parent] = {'entries': None, 'offset': 0, 'page_end': 0, 'more': None, 'job': None,
+                                   'dirty': False}
+        self.update_status()
+        worker = threading.Thread(target=self.list_folder, args=(self.model, parent, path), daemon=True)
+        worker.start()
+
+    def list_folder(self, model, parent, path):
+        """
+        Lists and sorts a folder on a worker thread and posts the entries to `listing_queue`.
+
+        Args:
+            model (ExplorerModel): The model the folder belongs to.
+            parent (str): The folder node the entries are inserted below.
+            path (str): The folder path.
+        """
+        self.listing_queue.put((model, parent, model.list_dir(path)))
+
+    def poll_listing_queue(self):
+        """
+        Starts inserting the folder listings posted by `list_folder` on the Tk main thread.
+
+        Listings that belong to a previously opened folder or to a node that no longer exists
+        are discarded. The folder's placeholder child is removed once its entries arrive. If
+        the folder changed while it was being listed, it is scanned again through
+        `reconcile_tree`, so that `apply_fs_changes` patches in the difference. The method
+        schedules itself to run again after `listing_poll_interval` milliseconds.
+        """
+        try:
+            while True:
+                model, parent, entries = self.listing_queue.get_nowait()
+                state = self.page_state.get(parent)
+                if model is not self.model or state is None or state['entries'] is not None:
+                    continue
+                if not self.tree.exists(parent):
+                    del self.page_state[parent]
+                    self.update_status()
+                    continue
+                for child in self.tree.get_children(parent):
+                    if self.tree.tag_has('placeholder', child):
+                        self.tree.delete(child)
+                state['entries'] = entries
+                if state['dirty']:
+                    worker = threading.Thread(target=self.reconcile_tree,
+                                              args=(model, [self.item_paths[parent]]), daemon=True)
+                    worker.start()
+                self.insert_next_page(parent)
+        except queue.Empty:
+            pass
+        self.root.after(self.listing_poll_interval, self.poll_listing_queue)
+
+    def insert_next_page(self, parent):
+        """
+        Starts inserting the next page of entries of a folder.
+
+        Args:
+            parent (str): The folder node whose entries are being inserted.
+        """
+        state = self.page_state[parent]
+        if state['more'] is not None:
+            self.tree.delete(state['more'])
+            state['more'] = None
+        state['page_end'] = min(state['offset'] + self.page_size, len(state['entries']))
+        self.insert_chunk(parent)
+
+    def insert_chunk(self, parent):
+        """
+        Inserts one chunk of a folder's pending entries and schedules the next chunk.
+
+        When the current page is complete and entries remain, a paging node is appended
+        instead. Progress is shown in the status label below the "Open Folder" button.
+
+        Args:
+            parent (str): The folder node whose entries are being inserted.
+        """
+        state = self.page_state.get(parent)
+        if state is None:
+            return
+        state['job'] = None
+        if not self.tree.exists(parent):
+            del self.page_state[parent]
+            self.update_status()
+            return
+
+        entries = state['entries']
+        end = min(state['offset'] + self.insert_chunk_size, state['page_end'])
+        with profiler.span('tree.insert_chunk', 'ui'):
+            for name, is_dir, is_link, size in entries[state['offset']:end]:
+                self.insert_item(parent, name, is_dir)
+        profiler.count('nodes_inserted', end - state['offset'])
+        state['offset'] = end
+
+        remaining = len(entries) - state['offset']
+        if state['offset'] < state['page_end']:
+            state['job'] = self.root.after(1, self.insert_chunk, parent)
+        elif remaining:
+            state['more'] = self.tree.insert(parent, 'end', text=f'   Show next {min(self.page_size, remaining)} of {remaining} entries...', tags=('more',))
+        else:
+            del self.page_state[parent]
+        self.update_status()
+
+    def update_status(self):
+        """
+        Shows the progress of all running listings and chunked inserts in the status label.
+        """
+        loading = [state for state in self.page_state.values() if state['job'] is not None]
+        listing = sum(1 for state in self.page_state.values() if state['entries'] is None)
+        if loading:
+            done = sum(state['offset'] for state in loading)
+            total = sum(state['page_end'] for state in loading)
+            self.status_label.configure(text=f'Loading {done:,} of {total:,} entries...')
+        elif listing:
+            self.status_label.configure(text=f'Listing {listing:,} folder{"s" if listing > 1 else ""}...')
+        else:
+            self.status_label.configure(text='')
+
+    def insert_item(self, parent, name, is_dir, index='end'):
+        """
+        Inserts a single file or directory node below the given parent node.
+
+        The absolute path of the new node is recorded in `item_paths`, so it never has to be
+        reconstructed from the display labels.
+
+        Args:
+            parent (str): The parent node in the tree view.
+            name (str): The file or directory name.
+            is_dir (bool): Whether the entry is a directory.
+            index (int or str): The position among the parent's children, 'end' by default.
+
+        Returns:
+            str: The identifier of the new node.
+        """
+        path = os.path.join(self.item_paths[parent], name)
+        if is_dir:
+            node = self.tree.insert(parent, index, text='   ' + name, open=False, image=self.folder_icon, tags=('dir',))
+            self.tree.insert(node, 'end', text='', tags=('placeholder',))
+        else:
+            node = self.tree.insert(parent, index, text='   ' + name, open=False, image=self.icons.for_name(name), tags=('file',))
+        self.item_paths[node] = path
+        return node
+
+    def on_fs_changes(self, model, dirty, renames):
+        """
+        Receives a batch of filesystem changes on the watcher thread.
+
+        The model rescans and sorts each dirty directory and updates its indexes here, off the
+        Tk main thread. The fresh listings are then passed on to `poll_watch_queue`.
+
+        Args:
+            model (ExplorerModel): The model the watcher was created for, bound in `open_root`,
+                                   so that a late batch never reaches the model of another root.
+            dirty (set): Paths of directories whose direct contents changed.
+            renames (list): `(old_path, new_path)` pairs reported by the watcher.
+        """
+        if model.closed:
+            return
+        listings = model.apply_changes(dirty, renames)
+        self.watch_queue.put((model, listings, renames))
+
+    def poll_watch_queue(self):
+        """
+        Applies batches of filesystem changes to the tree on the Tk main thread.
+
+        Batches that belong to a previously opened folder are discarded. The method schedules
+        itself to run again after `watch_poll_interval` milliseconds, so that a burst of
+        changes is patched in at most a few passes per second.
+        """
+        try:
+            while True:
+                model, listings, renames = self.watch_queue.get_nowait()
+                if model is self.model:
+                    self.apply_fs_changes(listings, renames)
+        except queue.Empty:
+            pass
+        self.root.after(self.watch_poll_interval, self.poll_watch_queue)
+
+    def apply_fs_changes(self, listings, renames):
+        """
+        Patches the tree with the minimal set of inserts, deletes and renames.
+
+        Renamed entries keep their node, so expanded state and selection survive. Only
+        directories that are loaded in the tree are patched. The file and folder counts of
+        the selected folder are updated from its listing; a change below it marks the size
+        shown as outdated rather than restarting the walk. The listings arrive sorted,
+        so each one is diffed against the keys of the materialized nodes in a single pass. New
+        entries that sort after the last materialized node are left to the folder's paging
+        node once `page_size` nodes are materialized, as in `insert_items`. Folders that are
+        still being listed are only marked dirty; `poll_listing_queue` scans them again.
+
+        Args:
+            listings (dict): Maps directory paths to their fresh entries, sorted like
+                             `ExplorerModel.list_dir`, or to None if they cannot be read.
+            renames (list): `(old_path, new_path)` pairs.
+        """
+        for old_path, new_path in renames:
+            parent = self.loaded_dirs.get(os.path.dirname(old_path))
+            if parent is None or os.path.dirname(old_path) != os.path.dirname(new_path):
                 continue
-            item_path = os.path.join(path, item)
-            if os.path.isdir(item_path):
-                node = self.tree.insert(parent, 'end', text='   ' + item, open=False, image=self.folder_icon)
-                self.insert_items(node, item_path)
-            else:
-                self.tree.insert(parent, 'end', text='   ' + item, open=False, image=self.file_icon)
+            for child in self.tree.get_children(parent):
+                if self.item_paths.get(child) == old_path:
+                    self.tree.item(child, text='   ' + os.path.basename(new_path))
+                    for item in self.subtree(child):
+                        if item in self.item_paths:
+                            self.item_paths[item] = new_path + self.item_paths[item][len(old_path):]
+                    break
+            for path in list(self.loaded_dirs):
+                if path == old_path or path.startswith(old_path + os.sep):
+                    self.loaded_dirs[new_path + path[len(old_path):]] = self.loaded_dirs.pop(path)
+
+        for path, entries in listings.items():
+            parent = self.loaded_dirs.get(path)
+            if parent is None or not self.tree.exists(parent):
+                continue
+            if entries is None:
+                continue
+            state = self.page_state.get(parent)
+            if state is not None and state['entries'] is None:
+                state['dirty'] = True
+                continue
+            existing = {}
+            for child in self.tree.get_children(parent):
+                if child in self.item_paths:
+                    existing[os.path.basename(self.item_paths[child])] = (child, self.tree.tag_has('dir', child))
+            fresh = {name: bool(is_dir) for name, is_dir, is_link, size in entries}
+            for name, (child, was_dir) in list(existing.items()):
+                if fresh.get(name) != was_dir:
+                    self.remove_item(os.path.join(path, name), child)
+                    del existing[name]
+
+            # Entries of a paged folder that are not materialized yet stay pending
+            keys = sorted(natural_sort_key(name, was_dir) for name, (child, was_dir) in existing.items())
+            pending = []
+            for index, (name, is_dir, is_link, size) in enumerate(entries):
+                if name in existing:
+                    continue
+                key = natural_sort_key(name, is_dir)
+                if (state is not None or len(keys) >= self.page_size) and (not keys or key > keys[-1]):
+                    pending = [entry for entry in entries[index:] if entry[0] not in existing]
+                    break
+                position = bisect.bisect(keys, key)
+                self.insert_item(parent, name, is_dir, position)
+                keys.insert(position, key)
+            if state is None and pending:
+                state = self.page_state[parent] = {'entries': [], 'offset': 0, 'page_end': 0, 'more': None,
+                                                   'job': None, 'dirty': False}
+            if state is not None:
+                state['page_end'] = min(state['page_end'] - state['offset'], len(pending))
+                state['entries'], state['offset'] = pending, 0
+                if state['job'] is not None:
+                    continue
+                if not pending:
+                    if state['more'] is not None:
+                        self.tree.delete(state['more'])
+                    del self.page_state[parent]
+                    continue
+                text = f'   Show next {min(self.page_size, len(pending))} of {len(pending)} entries...'
+                if state['more'] is None:
+                    state['more'] = self.tree.insert(parent, 'end', text=text, tags=('more',))
+                else:
+                    self.tree.item(state['more'], text=text)
+
+        if self.metadata_shown is None or self.metadata_info['path'] != self.current_folder_path:
+            return
+        selected = os.path.normpath(os.path.join(self.current_root_path, self.current_folder_path))
+        if not any(path == selected or path.startswith(selected + os.sep) for path in listings):
+            return
+        if listings.get(selected) is not None:
+            num_dirs = sum(1 for entry in listings[selected] if entry[1])
+            self.metadata_info['files'] = len(listings[selected]) - num_dirs
+            self.metadata_info['dirs'] = num_dirs
+        self.metadata_outdated = True
+        self.show_metadata(*self.metadata_shown)
+
+    def remove_item(self, path, item):
+        """
+        Deletes a node from the tree and forgets any loaded directories below it.
+
+        Args:
+            path (str): The absolute path the node represented.
+            item (str): The identifier of the node.
+        """
+        for node in self.subtree(item):
+            self.item_paths.pop(node, None)
+        self.tree.delete(item)
+        for loaded in list(self.loaded_dirs):
+            if loaded == path or loaded.startswith(path + os.sep):
+                del self.loaded_dirs[loaded]
+        self.watcher.unwatch(path)
+
+    def subtree(self, item):
+        """
+        Yields the given node and all of its descendants that are present in the tree.
+
+        Args:
+            item (str): The identifier of the subtree's root node.
+        """
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(self.tree.get_children(node))
+
+    def on_tree_open(self, event):
+        """
+        Loads the contents of a directory node the first time it is expanded.
+
+        Args:
+            event: The event object of the <<TreeviewOpen>> event.
+
+        If the opened node still holds its placeholder child, the placeholder shows that the
+        directory is being listed until `insert_items` has scanned it.
+        """
+        item = self.tree.focus()
+        children = self.tree.get_children(item)
+        if len(children) == 1 and 'placeholder' in self.tree.item(children[0], 'tags') and item not in self.page_state:
+            self.tree.item(children[0], text='   Loading...')
+            self.insert_items(item, self.get_full_path(item))
 
     def on_file_select(self, event):
         """
@@ -328,47 +1150,237 @@ class FileExplorer:
         Args:
             event: The event object containing information about the selection event.
 
-        Retrieves the selected item's text and its parent's path, constructs the full path
-        of the selected item, and updates the current folder path relative to the root path.
-        If the selected item is a directory, it updates the metadata and displays the README file.
+        Selecting a paging node loads the next page of its folder. Otherwise looks up the
+        full path of the selected item and hands it to `schedule_select`, which updates the
+        metadata and displays the README file once the selection settles.
+
+        """
+        selection = self.tree.selection()
+        if not selection:
+            return
+        selected_item = selection[0]
+        if self.tree.tag_has('more', selected_item):
+            self.insert_next_page(self.tree.parent(selected_item))
+            return
+        self.schedule_select(self.get_full_path(selected_item))
+
+    def schedule_select(self, selected_path):
+        """
+        Debounces a selection change so that only the final one of a quick series is loaded.
+
+        Holding an arrow key in the tree selects every row in turn. Each selection bumps
+        `select_generation`, `metadata_generation` and `preview_generation`, which abandons
+        the size walk and the preview of the previous row, and shows the cached metadata of
+        the new row right away if there is any, or the cached preview of a file. The full
+        update by `select_path` only runs once the selection has been stable for
+        `select_delay` milliseconds.
 
+        Args:
+            selected_path (str): The absolute path of the selected file or directory.
         """
-        selected_item = self.tree.selection()[0]
-        item_text = self.tree.item(selected_item, 'text').strip()
-        parent_iid = self.tree.parent(selected_item)
-        parent_path = self.get_full_path(parent_iid)
-        selected_path = os.path.join(self.current_root_path, parent_path, item_text)
+        if not selected_path or self.model is None:
+            return
+        self.select_generation += 1
+        self.metadata_generation += 1
+        self.preview_generation += 1
+        if self.select_job is not None:
+            self.root.after_cancel(self.select_job)
+        preview = self.previewer.cached(selected_path)
+        if preview is not None:
+            self.render_preview(selected_path, preview)
+        else:
+            self.show_cached_metadata(selected_path)
+        self.select_job = self.root.after(self.select_delay, self.run_select, self.select_generation, selected_path)
+
+    def run_select(self, generation, selected_path):
+        """
+        Runs the full update for a debounced selection unless a newer one superseded it.
+
+        Args:
+            generation (int): The selection generation this update belongs to.
+            selected_path (str): The absolute path of the selected file or directory.
+        """
+        self.select_job = None
+        if generation != self.select_generation:
+            return
+        with profiler.span('tree.select', 'ui'):
+            self.select_path(selected_path)
+
+    def show_cached_metadata(self, folder_path):
+        """
+        Shows the last known metadata of a folder without touching the disk.
+
+        Nothing is shown for a folder that has never been scanned; `update_metadata` fills
+        in the panel once the selection settles.
+
+        Args:
+            folder_path (str): The path of the selected folder.
+        """
+        counts = self.model.cached_counts(folder_path)
+        if counts is None:
+            return
+        self.metadata_info = {
+            'path': os.path.relpath(folder_path, self.current_root_path),
+            'files': counts[0],
+            'dirs': counts[1],
+        }
+        self.show_metadata(self.model.cached_size(folder_path) or 0, done=False,
+                           analytics=self.model.cached_analytics(folder_path))
+
+    def select_path(self, selected_path):
+        """
+        Makes the given path the current selection and updates the side panels.
+
+        A directory updates the metadata and README panels; a file is previewed in the
+        metadata panel.
+
+        Args:
+            selected_path (str): The absolute path of the selected file or directory.
+        """
+        if not selected_path:
+            return
         self.current_folder_path = os.path.relpath(selected_path, self.current_root_path)
 
         if os.path.isdir(selected_path):
             self.update_metadata(selected_path)
             self.display_readme(selected_path)
+        else:
+            self.show_preview(selected_path)
+
+        # The documentation scroll position of a restored session
+        if self.pending_readme_scroll is not None:
+            path, fraction = self.pending_readme_scroll
+            self.pending_readme_scroll = None
+            if path == selected_path:
+                self.readme_text.yview_moveto(fraction)
+
+    def on_search_changed(self, *args):
+        """
+        Schedules a search shortly after the text in the search box stops changing.
+        """
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(150, self.run_search)
+
+    def run_search(self):
+        """
+        Starts a search for the text in the search box, or leaves search mode if it is empty.
+
+        While searching, the results list replaces the tree; results are streamed into it by
+        `stream_results`. An empty query brings back the tree with its expanded state intact.
+        """
+        self.search_job = None
+        self.search_generation += 1
+        query = self.search_var.get().strip()
+        self.results_tree.delete(*self.results_tree.get_children())
+        self.result_paths = {}
+        if not query or self.model is None:
+            if self.search_active:
+                self.search_active = False
+                self.results_tree.pack_forget()
+                self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+                self.tree_scrollbar.configure(command=self.tree.yview)
+            self.status_label.configure(text='')
+            return
+        if not self.search_active:
+            self.search_active = True
+            self.tree.pack_forget()
+            self.results_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            self.results_tree.configure(yscrollcommand=self.tree_scrollbar.set)
+            self.tree_scrollbar.configure(command=self.results_tree.yview)
+        self.stream_results(self.search_generation, query, 0)
+
+    def stream_results(self, generation, query, start):
+        """
+        Inserts search results into the results list for a few milliseconds at a time.
+
+        Each pass scans the entries indexed so far, starting at entry id `start`. While the
+        `FilenameIndex` is still being built, further passes pick up newly indexed entries.
+        If the finished index holds no substring match, the closest fuzzy matches are shown.
+
+        Args:
+            generation (int): The search this pass belongs to; stale passes stop immediately.
+            query (str): The search text.
+            start (int): The first entry id to scan in this pass.
+        """
+        if generation != self.search_generation:
+            return
+        index = self.model.filename_index
+        complete = index.complete
+        stop = len(index)
+        deadline = time.monotonic() + 0.015
+        with profiler.span('search.stream', 'ui'):
+            for entry_id in index.search(query, start, stop):
+                self.insert_result(entry_id)
+                if len(self.result_paths) >= self.max_search_results:
+                    self.status_label.configure(text=f'First {self.max_search_results:,} matches')
+                    return
+                if time.monotonic() > deadline:
+                    self.root.after(1, self.stream_results, generation, query, entry_id + 1)
+                    return
+        if not complete:
+            self.status_label.configure(text=f'{len(self.result_paths):,} matches, indexing {stop:,} names...')
+            self.root.after(200, self.stream_results, generation, query, stop)
+            return
+        if not self.result_paths:
+            for entry_id in index.fuzzy_search(query):
+                self.insert_result(entry_id)
+            self.status_label.configure(text=f'No exact matches, {len(self.result_paths):,} similar names')
+            return
+        self.status_label.configure(text=f'{len(self.result_paths):,} matches')
+
+    def insert_result(self, entry_id):
+        """
+        Appends one `FilenameIndex` entry to the results list, labeled with its relative path.
+
+        Args:
+            entry_id (int): The entry id in the `FilenameIndex`.
+        """
+        filename_index = self.model.filename_index
+        path = filename_index.path(entry_id)
+        icon = self.icon_for(filename_index.names[entry_id], filename_index.is_dir[entry_id])
+        tags = ('dir',) if filename_index.is_dir[entry_id] else ('file',)
+        node = self.results_tree.insert('', 'end', text='   ' + os.path.relpath(path, self.current_root_path),
+                                        image=icon, tags=tags)
+        self.result_paths[node] = path
+
+    def on_result_select(self, event):
+        """
+        Handles the event when a search result is selected.
+
+        Args:
+            event: The event object containing information about the selection event.
+        """
+        selection = self.results_tree.selection()
+        if selection:
+            self.schedule_select(self.result_paths.get(selection[0], ''))
 
     def get_full_path(self, item):
         """
-        Constructs the full path of a given item in the tree.
+        Returns the absolute path of a given item in the tree.
+
+        Paths are recorded in `item_paths` when items are inserted, so the lookup does not
+        touch the tree widget and does not depend on the display labels.
 
         Args:
             item (str): The identifier of the item in the tree.
 
         Returns:
-            str: The full path of the item, constructed by joining the text of each 
-                 item from the root to the given item. Returns an empty string if 
-                 the path is empty.
+            str: The absolute path of the item. Returns an empty string for items without
+                 a path, such as the placeholder children of unopened folders.
         """
-        path = []
-        while item:
-            path.insert(0, self.tree.item(item, 'text').strip())
-            item = self.tree.parent(item)
-        return os.path.join(*path) if path else ''
+        return self.item_paths.get(item, '')
 
     def update_metadata(self, folder_path):
         """
         Update the metadata information for the given folder path.
 
-        This method calculates the number of files, number of directories, and the total size
-        of all files (excluding '.DS_Store') within the specified folder. It then updates the
-        metadata display with this information.
+        The last known number of files and directories directly within the folder, total size
+        and analytics are shown right away, without touching the disk. The fresh counts, the
+        total size of all files (excluding '.DS_Store') and the analytics are computed on a
+        worker thread by `compute_folder_size` and the display is updated as the walk
+        progresses. Starting a new update abandons any walk still running for a previous
+        selection.
 
         Args:
             folder_path (str): The path to the folder for which metadata is to be updated.
@@ -376,23 +1388,275 @@ class FileExplorer:
         Updates:
             self.metadata_text (tk.Text): The text widget displaying the metadata information.
         """
-        num_files = 0
-        num_dirs = 0
-        total_size = 0
-        for root, dirs, files in os.walk(folder_path):
-            num_files += len([f for f in files if f != '.DS_Store'])
-            num_dirs += len(dirs)
-            break
-        for root, dirs, files in os.walk(folder_path):
-            total_size += sum(os.path.getsize(os.path.join(root, name)) for name in files if name != '.DS_Store')
-
-        metadata_info = f"Path: {self.current_folder_path}\n"
-        metadata_info += f"Files: {num_files}\n"
-        metadata_info += f"Directories: {num_dirs}\n"
-        metadata_info += f"Size: {total_size / (1024 * 1024):.2f} MB\n"
+        num_files, num_dirs = self.model.cached_counts(folder_path) or (None, None)
+
+        self.metadata_generation += 1
+        self.preview_generation += 1
+        self.metadata_outdated = False
+        self.metadata_info = {
+            'path': self.current_folder_path,
+            'files': num_files,
+            'dirs': num_dirs,
+        }
+        self.show_metadata(self.model.cached_size(folder_path) or 0, done=False,
+                           analytics=self.model.cached_analytics(folder_path))
+
+        worker = threading.Thread(target=self.compute_folder_size,
+                                  args=(folder_path, self.metadata_generation), daemon=True)
+        worker.start()
+
+    def compute_folder_size(self, folder_path, generation):
+        """
+        Counts the entries of the given folder on a worker thread, then walks it and reports
+        the running size total.
+
+        The walk goes through `ExplorerModel.folder_analytics`, so only directories that
+        changed since the last run are rescanned and only their summaries are rebuilt.
+
+        Updates are posted to `metadata_queue` as `(generation, total_size, analytics, counts)`
+        tuples. The first one carries the fresh `(num_files, num_dirs)` of the folder and no
+        size; the walk's progress follows at most every `metadata_poll_interval`
+        milliseconds, and `analytics` is None until the walk is done. The walk stops as soon
+        as `metadata_generation` no longer matches, i.e. the user selected something else.
+
+        Args:
+            folder_path (str): The path to the folder whose size is computed.
+            generation (int): The metadata generation this walk belongs to.
+        """
+        if generation != self.metadata_generation:
+            return
+        self.metadata_queue.put((generation, None, None, self.model.counts(folder_path)))
+        last_report = [time.monotonic()]
+
+        def report(total_size):
+            now = time.monotonic()
+            if (now - last_report[0]) * 1000 >= self.metadata_poll_interval:
+                self.metadata_queue.put((generation, total_size, None, None))
+                last_report[0] = now
+
+        analytics = self.model.folder_analytics(folder_path,
+                                                cancelled=lambda: generation != self.metadata_generation,
+                                                progress=report)
+        if analytics is not None:
+            self.metadata_queue.put((generation, analytics.size, analytics, None))
+
+    def poll_metadata_queue(self):
+        """
+        Applies count and size updates posted by `compute_folder_size` on the Tk main thread.
+
+        Updates belonging to an outdated generation are discarded. The method schedules
+        itself to run again after `metadata_poll_interval` milliseconds.
+        """
+        try:
+            while True:
+                generation, total_size, analytics, counts = self.metadata_queue.get_nowait()
+                if generation != self.metadata_generation:
+                    continue
+                if counts is not None:
+                    self.metadata_info['files'], self.metadata_info['dirs'] = counts
+                if total_size is None:
+                    if self.metadata_shown is not None:
+                        self.show_metadata(*self.metadata_shown)
+                else:
+                    self.show_metadata(total_size, analytics is not None, analytics)
+        except queue.Empty:
+            pass
+        self.root.after(self.metadata_poll_interval, self.poll_metadata_queue)
+
+    def show_metadata(self, total_size, done, analytics=None):
+        """
+        Renders the current metadata information into the metadata panel.
+
+        A size that was computed before a change below the folder is marked as outdated; it
+        is recounted the next time the folder is selected.
+
+        Args:
+            total_size (int): The total size in bytes counted so far.
+            done (bool): Whether the size computation has finished.
+            analytics (FolderAnalytics, optional): The folder summary to show below the counts.
+        """
+        metadata_info = f"Path: {self.metadata_info['path']}\n"
+        counted = lambda count: 'counting...' if count is None else count
+        metadata_info += f"Files: {counted(self.metadata_info['files'])}\n"
+        metadata_info += f"Directories: {counted(self.metadata_info['dirs'])}\n"
+        status = ' (counting...)' if not done else ' (outdated, select again to recount)' if self.metadata_outdated else ''
+        metadata_info += f"Size: {total_size / (1024 * 1024):.2f} MB{status}\n"
+        if analytics is not None:
+            metadata_info += self.format_analytics(analytics)
 
         self.metadata_text.delete(1.0, tk.END)
         self.metadata_text.insert(tk.END, metadata_info)
+        self.metadata_shown = (total_size, done, analytics)
+
+    def show_preview(self, file_path):
+        """
+        Shows the preview of a file in the metadata panel.
+
+        A cached preview is shown right away; otherwise the file's name is shown until a
+        worker thread has generated the preview. The next `preview_prefetch` files below the
+        selected row are previewed in the background as well, so stepping through a folder
+        of images finds their thumbnails ready. Prefetching runs on its own worker, so it
+        never delays the preview of the selection, and it is not abandoned when the
+        selection moves on.
+
+        Args:
+            file_path (str): The absolute path of the selected file.
+        """
+        self.preview_generation += 1
+        self.metadata_generation += 1
+        preview = self.previewer.cached(file_path)
+        self.render_preview(file_path, preview)
+        if preview is None:
+            self.preview_executor.submit(self.generate_preview, file_path, self.preview_generation, False)
+
+        for sibling in self.next_files(file_path):
+            if sibling not in self.prefetching:
+                self.prefetching.add(sibling)
+                self.prefetch_executor.submit(self.generate_preview, sibling, self.preview_generation, True)
+
+    def next_files(self, file_path):
+        """
+        Returns the paths of the files in the rows following a selected file.
+
+        The rows are taken from the tree or the search results, whichever is shown, so no
+        directory has to be listed on the Tk main thread.
+
+        Args:
+            file_path (str): The absolute path of the selected file.
+
+        Returns:
+            list: At most `preview_prefetch` absolute file paths.
+        """
+        if self.search_active:
+            tree, paths = self.results_tree, self.result_paths
+        else:
+            tree, paths = self.tree, self.item_paths
+        selection = tree.selection()
+        if not selection or paths.get(selection[0]) != file_path:
+            return []
+        files = []
+        item = tree.next(selection[0])
+        while item and len(files) < self.preview_prefetch:
+            path = paths.get(item)
+            if path and tree.tag_has('file', item):
+                files.append(path)
+            item = tree.next(item)
+        return files
+
+    def generate_preview(self, file_path, generation, prefetch):
+        """
+        Generates a file preview on a worker thread.
+
+        Work for a selection the user has already moved past is skipped, except for
+        prefetching. Prefetched previews only fill the cache; the others are posted to
+        `preview_queue`, None standing for a file that cannot be read.
+
+        Args:
+            file_path (str): The absolute path of the file.
+            generation (int): The preview generation this job belongs to.
+            prefetch (bool): Whether the preview is generated ahead of its selection.
+        """
+        if prefetch:
+            try:
+                self.previewer.generate(file_path)
+            finally:
+                self.prefetching.discard(file_path)
+            return
+        if generation != self.preview_generation:
+            return
+        self.preview_queue.put((generation, file_path, self.previewer.generate(file_path)))
+
+    def poll_preview_queue(self):
+        """
+        Shows previews posted by `generate_preview` on the Tk main thread.
+
+        Previews belonging to an outdated generation are discarded. The method schedules
+        itself to run again after `preview_poll_interval` milliseconds.
+        """
+        try:
+            while True:
+                generation, file_path, preview = self.preview_queue.get_nowait()
+                if generation == self.preview_generation:
+                    self.render_preview(file_path, preview, failed=preview is None)
+        except queue.Empty:
+            pass
+        self.root.after(self.preview_poll_interval, self.poll_preview_queue)
+
+    def render_preview(self, file_path, preview, failed=False):
+        """
+        Renders a file preview into the metadata panel.
+
+        Args:
+            file_path (str): The absolute path of the file.
+            preview (dict): The preview made by `FilePreviewer`, or None while it is generated.
+            failed (bool): Whether the file could not be read, so there is no preview.
+        """
+        megabytes = lambda size: f"{size / (1024 * 1024):.2f} MB"
+        self.metadata_shown = None
+        self.metadata_text.delete(1.0, tk.END)
+        self.metadata_text.insert(tk.END, f"Path: {os.path.relpath(file_path, self.current_root_path)}\n")
+        self.preview_image = None
+        if failed:
+            self.metadata_text.insert(tk.END, "No preview: the file cannot be read.\n")
+            return
+        if preview is None:
+            self.metadata_text.insert(tk.END, "Loading preview...\n")
+            return
+
+        self.metadata_text.insert(tk.END, f"Size: {megabytes(preview['size'])}\n")
+        self.metadata_text.insert(
+            tk.END, f"Modified: {time.strftime('%Y-%m-%d %H:%M', time.localtime(preview['mtime_ns'] / 1e9))}\n")
+        if preview['kind'] == 'image':
+            self.metadata_text.insert(
+                tk.END, f"Image: {preview['format']}, {preview['width']} x {preview['height']} pixels\n\n")
+            try:
+                self.preview_image = tk.PhotoImage(data=preview['png'])
+                self.metadata_text.image_create(tk.END, image=self.preview_image)
+            except tk.TclError:
+                self.metadata_text.insert(tk.END, "The thumbnail cannot be displayed.")
+        elif preview['kind'] == 'text':
+            self.metadata_text.insert(tk.END, "\n")
+            self.metadata_text.insert(tk.END, preview['text'], 'preview_text')
+            if preview['size'] > self.previewer.text_bytes:
+                self.metadata_text.insert(tk.END, "\n...", 'preview_text')
+        else:
+            self.metadata_text.insert(tk.END, "Binary file, first bytes:\n\n")
+            head = preview['head']
+            self.metadata_text.insert(tk.END, '\n'.join(head[offset:offset + 16].hex(' ')
+                                                        for offset in range(0, len(head), 16)), 'preview_text')
+
+    @staticmethod
+    def format_analytics(analytics):
+        """
+        Formats a `FolderAnalytics` summary for the metadata panel.
+
+        Args:
+            analytics (FolderAnalytics): The summary of the selected folder.
+
+        Returns:
+            str: The formatted text, starting with a blank line.
+        """
+        megabytes = lambda size: f"{size / (1024 * 1024):.2f} MB"
+        timestamp = lambda mtime_ns: time.strftime('%Y-%m-%d %H:%M', time.localtime(mtime_ns / 1e9))
+
+        text = f"\nAll files: {analytics.files:,}\n"
+        text += f"All directories: {analytics.dirs:,}\n"
+        if analytics.files:
+            text += f"Depth: files {analytics.max_depth} levels deep at most, {analytics.depth_sum / analytics.files:.1f} on average\n"
+        text += f"Fan-out: {analytics.entries / analytics.folders:.1f} entries per folder on average, "
+        text += f"{analytics.max_fanout[0]:,} at most in {analytics.max_fanout[1] or '.'}\n"
+        if analytics.newest is not None:
+            text += f"Newest: {timestamp(analytics.newest[0])} {analytics.newest[1]}\n"
+            text += f"Oldest: {timestamp(analytics.oldest[0])} {analytics.oldest[1]}\n"
+        if analytics.extensions:
+            text += "\nSize by type:\n"
+            for extension, size, count in analytics.by_extension()[:10]:
+                text += f"  {extension}: {megabytes(size)} in {count:,} files\n"
+        if analytics.largest:
+            text += "\nLargest files:\n"
+            for size, path in analytics.largest_files():
+                text += f"  {megabytes(size)} {path}\n"
+        return text
 
     def display_readme(self, path):
         """
@@ -404,15 +1668,28 @@ class FileExplorer:
         Behavior:
             - If the specified path is a directory, it searches for a README.md file within that directory.
             - If a README.md file is found, its content is read and displayed in the readme_text widget.
+              Files larger than `large_readme_size` are loaded in windows by `open_readme_window`.
             - If no README.md file is found, a message "No README.md found." is displayed in the readme_text widget.
             - If the specified path is not a directory, a message "Selected item is not a directory." is displayed in the readme_text widget.
+            - Unsaved edits to the previously displayed README are handed to the writer first.
         """
+        self.flush_readme()
+        self.close_readme_window()
+        self.readme_frame.configure(text="Documentation")
+        self.readme_text.configure(state=tk.NORMAL)
         if os.path.isdir(path):
-            readme_path = self.find_readme(path)
-            if readme_path:
+            readme_path = self.model.find_readme(path)
+            try:
+                size = os.path.getsize(readme_path)
+            except OSError:
+                size = 0
+            if readme_path and size > self.large_readme_size:
+                self.open_readme_window(readme_path, size)
+            elif readme_path:
                 self.current_readme_path = readme_path
-                with open(readme_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
+                content = self.model.read_readme(readme_path)
+                self.readme_saved_hash = hashlib.sha1(content.encode('utf-8')).digest()
+                self.readme_pending_hash = None
                 self.readme_text.delete(1.0, tk.END)
                 self.readme_text.insert(tk.END, content)
             else:
@@ -423,48 +1700,644 @@ class FileExplorer:
             self.current_readme_path = ""
             self.readme_text.delete(1.0, tk.END)
             self.readme_text.insert(tk.END, "Selected item is not a directory.")
+        self.readme_text.edit_modified(False)
+        self.restyle_markdown()
+
+    def open_readme_window(self, readme_path, size):
+        """
+        Displays a large README.md by memory-mapping it and loading it a window at a time.
+
+        Only the first `readme_chunk_size` bytes are inserted up front; `on_readme_scroll`
+        loads further windows as the user scrolls towards the end. Edits are saved from the
+        loaded head, with the untouched rest copied from the mapping by the writer. Files
+        above `readonly_readme_size` are shown read-only, as are large files on Windows,
+        where a mapped file cannot be replaced.
 
-    def find_readme(self, path):
+        Args:
+            readme_path (str): The path of the README.md file.
+            size (int): The file size in bytes.
+        """
+        with open(readme_path, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        readonly = size > self.readonly_readme_size or os.name == 'nt'
+        self.readme_window = {'path': readme_path, 'mmap': mapping, 'size': size, 'loaded': 0,
+                              'readonly': readonly, 'loading': False}
+        self.current_readme_path = "" if readonly else readme_path
+        self.readme_text.delete(1.0, tk.END)
+        self.load_readme_chunk()
+        self.readme_saved_hash = hashlib.sha1(self.readme_text.get(1.0, 'end-1c').encode('utf-8')).digest()
+        self.readme_pending_hash = None
+
+    def close_readme_window(self):
+        """
+        Releases the memory mapping of a large README loaded in windows.
+
+        A pending save copies the rest of the file from the mapping, so queued saves are
+        written before the mapping is closed. If the writer is still busy when the wait
+        times out, the mapping is left open; it is unmapped once the writer drops its last
+        reference to it.
+        """
+        window = self.readme_window
+        if window is None:
+            return
+        written = self.flush_readme(wait=True)
+        self.readme_window = None
+        if written:
+            window['mmap'].close()
+
+    def load_readme_chunk(self):
         """
-        Finds or creates a README.md file in the specified directory.
+        Appends the next window of a large README to the text widget.
+
+        Windows end on a line boundary. Loading is not an edit, so it neither marks the
+        widget as modified nor triggers an auto-save.
+        """
+        window = self.readme_window
+        if window is None or self.doc_results_active:
+            return
+        window['loading'] = False
+        mapping, start = window['mmap'], window['loaded']
+        end = min(start + self.readme_chunk_size, window['size'])
+        if end < window['size']:
+            newline = mapping.find(b'\n', end)
+            end = window['size'] if newline < 0 else newline + 1
+
+        self.readme_loading = True
+        first_line = int(self.readme_text.index('end-1c').split('.')[0])
+        self.readme_text.configure(state=tk.NORMAL)
+        with profiler.span('readme.load_chunk', 'ui'):
+            self.readme_text.insert(tk.END, mapping[start:end].decode('utf-8', errors='replace'))
+        profiler.count('bytes_read', end - start)
+        if window['readonly']:
+            self.readme_text.configure(state=tk.DISABLED)
+        self.readme_text.edit_modified(False)
+        self.readme_loading = False
+        window['loaded'] = end
+        self.queue_markdown(first_line, int(self.readme_text.index('end-1c').split('.')[0]))
+
+        mode = "read-only" if window['readonly'] else "large file"
+        self.readme_frame.configure(
+            text=f"Documentation ({mode}, {end / (1024 * 1024):.1f} of {window['size'] / (1024 * 1024):.1f} MB loaded)")
+
+    def on_readme_scroll(self, first, last):
+        """
+        Updates the Documentation scrollbar and loads more of a large README near the end.
 
         Args:
-            path (str): The directory path where to look for or create the README.md file.
+            first (str): The fraction of the content above the visible region.
+            last (str): The fraction of the content up to the end of the visible region.
+        """
+        self.readme_scrollbar.set(first, last)
+        window = self.readme_window
+        if self.doc_results_active or window is None:
+            return
+        if not window['loading'] and window['loaded'] < window['size'] and float(last) > 0.9:
+            window['loading'] = True
+            self.root.after_idle(self.load_readme_chunk)
+
+    def on_markdown_toggled(self):
+        """
+        Switches the Markdown view mode of the Documentation panel on or off.
+        """
+        self.restyle_markdown()
 
-        Returns:
-            str: The path to the README.md file.
+    def restyle_markdown(self):
+        """
+        Removes all Markdown styling and, in Markdown view mode, restyles the whole README.
+
+        The restyling itself runs in batches, see `tag_markdown`.
+        """
+        for tag in self.MARKDOWN_TAGS:
+            self.readme_text.tag_remove(tag, 1.0, tk.END)
+        self.markdown_ranges = []
+        self.markdown_lines = int(self.readme_text.index('end-1c').split('.')[0])
+        self.queue_markdown(1, self.markdown_lines)
+
+    def on_markdown_edited(self):
+        """
+        Queues the lines touched by an edit of the README for restyling.
 
-        If the README.md file does not exist in the specified directory, it will be created
-        with a default template.
+        Edits happen at the insertion cursor, so the touched lines are the cursor's line and,
+        if lines were added, as many lines above it.
         """
-        readme_path = os.path.join(path, 'README.md')
-        if os.path.exists(readme_path):
-            return readme_path
+        line = int(self.readme_text.index(tk.INSERT).split('.')[0])
+        lines = int(self.readme_text.index('end-1c').split('.')[0])
+        added = max(lines - self.markdown_lines, 0)
+        self.markdown_lines = lines
+        self.queue_markdown(line - added, line)
+
+    def queue_markdown(self, first, last):
+        """
+        Queues a range of lines for Markdown styling if the Markdown view mode is on.
+
+        Args:
+            first (int): The first line of the range.
+            last (int): The last line of the range.
+        """
+        if not self.markdown_var.get() or self.doc_results_active:
+            return
+        self.markdown_ranges.append((max(first, 1), last))
+        if self.markdown_job is None:
+            self.markdown_job = self.root.after_idle(self.tag_markdown)
+
+    def tag_markdown(self):
+        """
+        Styles at most `markdown_batch` queued lines and reschedules itself for the rest.
+
+        Every line is styled from its own text and from whether it starts inside a fenced
+        code block, which the 'md_open' tag of the previous line records. When opening or
+        closing a fence changes that state for the following line, styling carries on past
+        the queued range until the state matches what the next line was styled with.
+        """
+        self.markdown_job = None
+        if not self.markdown_var.get() or self.doc_results_active:
+            self.markdown_ranges = []
+            return
+        text = self.readme_text
+        last_line = int(text.index('end-1c').split('.')[0])
+        budget = self.markdown_batch
+        with profiler.span('readme.markdown', 'ui'):
+            while self.markdown_ranges and budget > 0:
+                first, last = self.markdown_ranges.pop()
+                line = first
+                inside = line > 1 and 'md_open' in text.tag_names(f'{line - 1}.0')
+                while line <= last_line and budget > 0:
+                    was_inside = 'md_open' in text.tag_names(f'{line}.0')
+                    inside = self.tag_markdown_line(line, inside)
+                    budget -= 1
+                    line += 1
+                    if line > last and inside == was_inside:
+                        break
+                else:
+                    if line <= last_line:
+                        self.markdown_ranges.append((line, max(last, line)))
+        if self.markdown_ranges:
+            self.markdown_job = self.root.after_idle(self.tag_markdown)
+
+    def tag_markdown_line(self, line, inside):
+        """
+        Applies the Markdown styles of one line of the README.
+
+        Args:
+            line (int): The line number.
+            inside (bool): Whether the line starts inside a fenced code block.
+
+        Returns:
+            bool: Whether the next line starts inside a fenced code block.
+        """
+        text = self.readme_text
+        start, end = f'{line}.0', f'{line + 1}.0'
+        for tag in self.MARKDOWN_TAGS:
+            text.tag_remove(tag, start, end)
+        content = text.get(start, f'{line}.0 lineend')
+        fence = self.MARKDOWN_FENCE.match(content)
+        if inside or fence:
+            text.tag_add('md_codeblock', start, end)
+            if inside and fence:
+                return False
+            text.tag_add('md_open', start, end)
+            return True
+
+        heading = self.MARKDOWN_HEADING.match(content)
+        if heading:
+            text.tag_add(f'md_h{min(len(heading.group(1)), 3)}', start, end)
+        elif self.MARKDOWN_QUOTE.match(content):
+            text.tag_add('md_quote', start, end)
         else:
-            with open(readme_path, "w") as readme:
-                readme.write("# This is a new README file.")
-                # add template for perfect README.md
-        return readme_path
+            item = self.MARKDOWN_LIST.match(content)
+            if item:
+                text.tag_add('md_list', f'{line}.{item.start(1)}', f'{line}.{item.end(1)}')
+        for tag, pattern in self.MARKDOWN_INLINE:
+            for match in pattern.finditer(content):
+                text.tag_add(tag, f'{line}.{match.start()}', f'{line}.{match.end()}')
+        return False
+
+    def on_readme_modified(self, event):
+        """
+        Schedules a debounced auto-save whenever the README text widget is edited.
+
+        Args:
+            event: The event object of the <<Modified>> event.
+
+        The widget's modified flag is reset right away so that the next edit fires the event
+        again; each edit pushes the pending save back by `auto_save_delay` milliseconds.
+        """
+        if not self.readme_text.edit_modified():
+            return
+        self.readme_text.edit_modified(False)
+        if not self.current_readme_path or self.readme_loading:
+            return
+        self.on_markdown_edited()
+        if self.auto_save_job is not None:
+            self.root.after_cancel(self.auto_save_job)
+        self.auto_save_job = self.root.after(self.auto_save_delay, self.auto_save)
 
     def auto_save(self):
         """
-        Automatically saves the content of the README text widget to the current README file path at regular intervals.
+        Saves the content of the README text widget to the current README file path if it changed.
 
-        This method retrieves the content from the `readme_text` widget and writes it to the file specified by 
-        `current_readme_path`. It then schedules itself to run again after a specified interval.
+        The content is compared by hash with the version still being written or, if there is
+        none, with the last loaded or saved version, and only a real change is handed to the
+        background `ReadmeWriter`, which writes it atomically. `readme_saved_hash` only
+        advances once the writer reports the write as done, see `poll_readme_save_queue`.
+        For a large README loaded in windows, only the loaded head is taken from the widget;
+        the writer copies the rest of the file from its memory mapping.
 
         Attributes:
             current_readme_path (str): The file path where the README content should be saved.
             readme_text (tk.Text): The Tkinter Text widget containing the README content.
-            auto_save_interval (int): The interval in milliseconds at which the auto-save should occur.
-            root (tk.Tk): The root Tkinter window, used to schedule the next auto-save.
+            readme_saved_hash (bytes): The hash of the content last loaded or saved.
+            readme_pending_hash (bytes): The hash of the content handed to the writer, if any.
+            readme_writer (ReadmeWriter): The background writer performing the save.
         """
+        self.auto_save_job = None
         if self.current_readme_path:
-            content = self.readme_text.get(1.0, tk.END)
-            with open(self.current_readme_path, 'w', encoding='utf-8') as file:
-                file.write(content)
-        self.root.after(self.auto_save_interval, self.auto_save)
-    
+            with profiler.span('readme.snapshot', 'ui'):
+                content = self.readme_text.get(1.0, 'end-1c')
+                content_hash = hashlib.sha1(content.encode('utf-8')).digest()
+            written = self.readme_saved_hash if self.readme_pending_hash is None else self.readme_pending_hash
+            if content_hash != written:
+                self.readme_pending_hash = content_hash
+                tail = None
+                if self.readme_window is not None:
+                    tail = (self.readme_window['mmap'], self.readme_window['loaded'])
+                self.readme_writer.submit(self.current_readme_path, content, tail, content_hash)
+
+    def flush_readme(self, wait=False):
+        """
+        Runs a pending debounced auto-save immediately.
+
+        Args:
+            wait (bool): Whether to block until the writer has written every queued save.
+
+        Returns:
+            bool: False if the wait timed out with saves still queued or being written.
+        """
+        if self.auto_save_job is not None:
+            self.root.after_cancel(self.auto_save_job)
+            self.auto_save()
+        if wait:
+            return self.readme_writer.flush(timeout=10)
+        return True
+
+    def on_close(self):
+        """
+        Saves pending README edits and releases background resources before closing the window.
+        """
+        self.flush_readme(wait=True)
+        self.save_session()
+        self.close_readme_window()
+        self.preview_generation += 1
+        self.preview_executor.shutdown(wait=False, cancel_futures=True)
+        self.prefetch_executor.shutdown(wait=False, cancel_futures=True)
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.model is not None:
+            self.model.close()
+        self.root.destroy()
+
+    def on_readme_written(self, path, content, content_hash):
+        """
+        Re-indexes a README right after the background writer saved it.
+
+        Called on the writer thread; the save is reported to `poll_readme_save_queue`.
+
+        Args:
+            path (str): The README file path.
+            content (str): The content that was written, or None if it has to be read back.
+            content_hash (bytes): The hash of the content, as submitted by `auto_save`.
+        """
+        if self.model is not None:
+            self.model.readme_written(path, content)
+        self.readme_save_queue.put((path, content_hash, None))
+
+    def on_readme_failed(self, path, error, content_hash):
+        """
+        Reports a README save that failed on the writer thread to `poll_readme_save_queue`.
+
+        Args:
+            path (str): The README file path.
+            error (Exception): The error raised by the write.
+            content_hash (bytes): The hash of the content, as submitted by `auto_save`.
+        """
+        self.readme_save_queue.put((path, content_hash, error))
+
+    def poll_readme_save_queue(self):
+        """
+        Applies the outcome of background README saves on the Tk main thread.
+
+        A successful save of the current README advances `readme_saved_hash`. A failed save
+        is shown in the status label and leaves the hash unchanged; another auto-save is
+        scheduled, so the save is retried after `auto_save_delay` milliseconds and by
+        `flush_readme`. The method schedules itself to run again after
+        `readme_save_poll_interval` milliseconds.
+        """
+        try:
+            while True:
+                path, content_hash, error = self.readme_save_queue.get_nowait()
+                if path == self.current_readme_path and content_hash == self.readme_pending_hash:
+                    self.readme_pending_hash = None
+                if error is not None:
+                    self.status_label.configure(text=f'Could not save {os.path.basename(path)}: {getattr(error, "strerror", None) or error}')
+                    if path == self.current_readme_path and self.auto_save_job is None:
+                        self.auto_save_job = self.root.after(self.auto_save_delay, self.auto_save)
+                elif path == self.current_readme_path:
+                    self.readme_saved_hash = content_hash
+        except queue.Empty:
+            pass
+        self.root.after(self.readme_save_poll_interval, self.poll_readme_save_queue)
+
+    def on_doc_search_changed(self, *args):
+        """
+        Schedules a documentation search shortly after the query stops changing.
+        """
+        if self.doc_search_job is not None:
+            self.root.after_cancel(self.doc_search_job)
+        self.doc_search_job = self.root.after(150, self.run_doc_search)
+
+    def run_doc_search(self):
+        """
+        Shows the README files matching the documentation query in the Documentation panel.
+
+        Each result is listed with its relative path and a snippet; clicking the path opens
+        the folder it documents. While results are shown the panel is read-only and nothing
+        is auto-saved. An empty query brings back the README of the current folder.
+        """
+        self.doc_search_job = None
+        query = self.doc_search_var.get().strip()
+        if not query:
+            if self.doc_results_active:
+                self.doc_results_active = False
+                self.display_readme(os.path.join(self.current_root_path, self.current_folder_path))
+            return
+        if self.model is None:
+            return
+
+        self.flush_readme()
+        self.close_readme_window()
+        self.readme_frame.configure(text="Documentation")
+        self.doc_results_active = True
+        self.current_readme_path = ""
+        self.markdown_ranges = []
+        results = self.model.readme_index.search(query)
+        self.readme_text.configure(state=tk.NORMAL)
+        self.readme_text.delete(1.0, tk.END)
+        if not results:
+            self.readme_text.insert(tk.END, "No matching README.md found.")
+        for number, (path, score) in enumerate(results):
+            link = f'doc_link_{number}'
+            self.readme_text.insert(tk.END, os.path.relpath(os.path.dirname(path), self.current_root_path), ('doc_title', link))
+            self.readme_text.insert(tk.END, '\n' + ReadmeIndex.snippet(path, query) + '\n\n', 'doc_snippet')
+            self.readme_text.tag_bind(link, '<Button-1>', lambda event, path=path: self.open_doc_result(path))
+        self.readme_text.configure(state=tk.DISABLED)
+
+    def open_doc_result(self, path):
+        """
+        Leaves the documentation search and selects the folder of a matching README.
+
+        Args:
+            path (str): The README file path.
+        """
+        self.doc_results_active = False
+        self.doc_search_var.set('')
+        self.select_path(os.path.dirname(path))
+
+    def find_duplicates(self):
+        """
+        Opens the duplicates panel and searches the opened root for identical files.
+
+        The search runs on a worker thread through `ExplorerModel.find_duplicates`; its
+        progress and every confirmed group of identical files are posted to
+        `duplicates_queue` and shown while the search goes on. Groups are listed by the
+        space they waste, largest first. Double-clicking a file selects its folder.
+        """
+        if self.model is None:
+            return
+        if self.duplicates_window is None:
+            colors = self.colors
+            self.duplicates_window = tk.Toplevel(self.root, bg=colors['bg_dark'])
+            self.duplicates_window.title("Duplicates")
+            self.duplicates_window.geometry("700x450")
+            self.duplicates_window.protocol('WM_DELETE_WINDOW', self.close_duplicates_panel)
+
+            frame = ttk.Frame(self.duplicates_window, padding=(5, 5, 5, 5))
+            frame.pack(fill=tk.BOTH, expand=True)
+            self.duplicates_status = ttk.Label(frame, text='', style='Status.TLabel')
+            self.duplicates_status.pack(fill=tk.X, pady=(0, 5))
+            self.duplicates_tree = ttk.Treeview(frame, show='tree')
+            self.duplicates_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.duplicates_tree.yview)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            self.duplicates_tree.configure(yscrollcommand=scrollbar.set)
+            self.duplicates_tree.bind('<Double-1>', self.on_duplicate_open)
+        else:
+            self.duplicates_window.lift()
+
+        self.duplicates_generation += 1
+        self.duplicates_tree.delete(*self.duplicates_tree.get_children())
+        self.duplicate_keys = []
+        self.duplicate_paths = {}
+        worker = threading.Thread(target=self.search_duplicates,
+                                  args=(self.model, self.duplicates_generation), daemon=True)
+        worker.start()
+        self.poll_duplicates_queue(self.duplicates_generation)
+
+    def search_duplicates(self, model, generation):
+        """
+        Runs the duplicate search on a worker thread and posts its progress and results.
+
+        Messages are posted to `duplicates_queue` as `(generation, kind, data)` tuples; the
+        search stops as soon as `duplicates_generation` no longer matches.
+
+        Args:
+            model (ExplorerModel): The model of the root being searched.
+            generation (int): The search this worker belongs to.
+        """
+        last_report = [0.0]
+
+        def progress(stage, done, total):
+            now = time.monotonic()
+            if now - last_report[0] >= 0.1 or done == total:
+                self.duplicates_queue.put((generation, 'progress', (stage, done, total)))
+                last_report[0] = now
+
+        groups = model.find_duplicates(
+            cancelled=lambda: generation != self.duplicates_generation,
+            progress=progress,
+            found=lambda size, paths: self.duplicates_queue.put((generation, 'found', (size, paths))))
+        self.duplicates_queue.put((generation, 'done', groups))
+
+    def poll_duplicates_queue(self, generation):
+        """
+        Shows the messages posted by `search_duplicates` until the search is done.
+
+        Args:
+            generation (int): The search being followed; the polling stops once it is outdated.
+        """
+        if generation != self.duplicates_generation:
+            return
+        try:
+            while True:
+                message_generation, kind, data = self.duplicates_queue.get_nowait()
+                if message_generation != generation:
+                    continue
+                if kind == 'progress':
+                    stage, done, total = data
+                    self.duplicates_status.configure(
+                        text=f'{stage}... {done:,} of {total:,}' if total else f'{stage}...')
+                elif kind == 'found':
+                    self.insert_duplicate_group(*data)
+                else:
+                    wasted = sum(size * (len(paths) - 1) for size, paths in data or [])
+                    self.duplicates_status.configure(
+                        text=f'{len(data or []):,} groups of identical files, '
+                             f'{wasted / (1024 * 1024):.2f} MB reclaimable')
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(100, self.poll_duplicates_queue, generation)
+
+    def insert_duplicate_group(self, size, paths):
+        """
+        Adds a group of identical files to the duplicates panel, ordered by wasted space.
+
+        Args:
+            size (int): The size of each file in bytes.
+            paths (list): The absolute paths of the identical files.
+        """
+        wasted = size * (len(paths) - 1)
+        index = bisect.bisect_left(self.duplicate_keys, -wasted)
+        self.duplicate_keys.insert(index, -wasted)
+        group = self.duplicates_tree.insert(
+            '', index, open=True,
+            text=f'{len(paths)} copies of {size / (1024 * 1024):.2f} MB, {wasted / (1024 * 1024):.2f} MB reclaimable')
+        for path in paths:
+            item = self.duplicates_tree.insert(group, 'end', text=os.path.relpath(path, self.current_root_path))
+            self.duplicate_paths[item] = path
+
+    def on_duplicate_open(self, event):
+        """
+        Selects the folder of a double-clicked duplicate file.
+
+        Args:
+            event: The event object of the double-click.
+        """
+        path = self.duplicate_paths.get(self.duplicates_tree.focus())
+        if path:
+            self.select_path(os.path.dirname(path))
+
+    def close_duplicates_panel(self):
+        """
+        Closes the duplicates panel and abandons a running search.
+        """
+        self.duplicates_generation += 1
+        if self.duplicates_window is not None:
+            self.duplicates_window.destroy()
+        self.duplicates_window = None
+
+    def toggle_profiler_panel(self):
+        """
+        Opens or closes the performance panel.
+
+        Profiling is only enabled while the panel is open. The panel lists the counters and
+        the latency percentiles of every instrumented span, refreshed twice a second, and
+        can export the recorded spans as a Chrome trace (chrome://tracing or Perfetto).
+        """
+        if self.profiler_window is not None:
+            self.close_profiler_panel()
+            return
+        colors = self.colors
+        self.profiler_window = tk.Toplevel(self.root, bg=colors['bg_dark'])
+        self.profiler_window.title("Performance")
+        self.profiler_window.geometry("640x420")
+        self.profiler_window.protocol('WM_DELETE_WINDOW', self.close_profiler_panel)
+        self.profiler_window.bind('<F12>', lambda event: self.close_profiler_panel())
+
+        button_frame = ttk.Frame(self.profiler_window, padding=(5, 5, 5, 0))
+        button_frame.pack(fill=tk.X)
+        ttk.Button(button_frame, text="Export Trace...", command=self.export_trace).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Reset", command=profiler.reset).pack(side=tk.LEFT)
+
+        self.profiler_text = tk.Text(self.profiler_window,
+            wrap=tk.NONE,
+            bg=colors['bg_medium'],
+            fg=colors['text'],
+            font=('Courier', 11),
+            padx=10,
+            pady=10,
+            borderwidth=0)
+        self.profiler_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        profiler.enabled = True
+        self.heartbeat_due = time.perf_counter_ns() + self.heartbeat_interval * 1000000
+        self.heartbeat_job = self.root.after(self.heartbeat_interval, self.check_heartbeat)
+        self.refresh_profiler_panel()
+
+    def close_profiler_panel(self):
+        """
+        Closes the performance panel and disables profiling.
+        """
+        profiler.enabled = False
+        for job in (self.heartbeat_job, self.profiler_refresh_job):
+            if job is not None:
+                self.root.after_cancel(job)
+        self.heartbeat_job = self.profiler_refresh_job = None
+        self.heartbeat_due = None
+        if self.profiler_window is not None:
+            self.profiler_window.destroy()
+        self.profiler_window = None
+        self.profiler_text = None
+
+    def check_heartbeat(self):
+        """
+        Measures how late the main loop runs a timer while the performance panel is open.
+
+        Lateness beyond a few milliseconds means the UI was blocked; it is recorded as a
+        'mainloop.lag' span covering the time the timer was overdue.
+        """
+        if self.heartbeat_due is None:
+            return
+        now = time.perf_counter_ns()
+        lag = now - self.heartbeat_due
+        if lag > 5000000:
+            profiler.record('mainloop.lag', 'lag', self.heartbeat_due, lag)
+            profiler.count('ui_lag_ms', lag / 1e6)
+        self.heartbeat_due = now + self.heartbeat_interval * 1000000
+        self.heartbeat_job = self.root.after(self.heartbeat_interval, self.check_heartbeat)
+
+    def refresh_profiler_panel(self):
+        """
+        Redraws the counters and span latencies in the performance panel.
+        """
+        if self.profiler_text is None:
+            return
+        with profiler.lock:
+            counters = sorted(profiler.counters.items())
+        lines = [f"{'counter':<28}{'value':>14}"]
+        lines += [f"{name:<28}{value:>14,.0f}" for name, value in counters]
+        lines += ['', f"{'span':<28}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, count, p50, p90, p99, maximum in profiler.summary():
+            lines.append(f"{name:<28}{count:>7}{p50:>10.2f}{p90:>10.2f}{p99:>10.2f}{maximum:>10.2f}")
+
+        self.profiler_text.configure(state=tk.NORMAL)
+        self.profiler_text.delete(1.0, tk.END)
+        self.profiler_text.insert(tk.END, '\n'.join(lines))
+        self.profiler_text.configure(state=tk.DISABLED)
+        self.profiler_refresh_job = self.root.after(500, self.refresh_profiler_panel)
+
+    def export_trace(self):
+        """
+        Asks for a file name and writes the recorded spans to it as a Chrome trace.
+        """
+        path = filedialog.asksaveasfilename(parent=self.profiler_window, defaultextension='.json',
+                                            initialfile='explorer-trace.json',
+                                            filetypes=[('Trace files', '*.json')])
+        if path:
+            try:
+                profiler.export_chrome_trace(path)
+            except OSError as error:
+                self.status_label.configure(text=f'Could not export trace: {error}')
+
     def show_context_menu(self, event):
         """
         Display the context menu at the location of the event.
@@ -485,8 +2358,8 @@ class FileExplorer:
         """
         Opens the selected file in the file explorer.
 
-        This method retrieves the selected item from the tree view, constructs the full path
-        to the selected file, and opens it using the appropriate system command based on the
+        This method retrieves the selected item from the tree view or the search results,
+        looks up the full path to the selected file, and opens it using the appropriate system command based on the
         operating system.
 
         - On Windows, it uses `os.startfile()`.
@@ -494,13 +2367,11 @@ class FileExplorer:
 
         Raises:
             IndexError: If no item is selected in the tree view.
-            KeyError: If the selected item does not have a parent in the tree view.
         """
-        selected_item = self.tree.selection()[0]
-        item_text = self.tree.item(selected_item, 'text').strip()
-        parent_iid = self.tree.parent(selected_item)
-        parent_path = self.get_full_path(parent_iid)
-        selected_path = os.path.join(self.current_root_path, parent_path, item_text)
+        if self.search_active:
+            selected_path = self.result_paths.get(self.results_tree.selection()[0], '')
+        else:
+            selected_path = self.get_full_path(self.tree.selection()[0])
 
         if os.path.isfile(selected_path):
             if os.name == 'nt':  # Windows
@@ -510,5 +2381,5 @@ class FileExplorer:
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = FileExplorer(root)
+    app = FileExplorer(root, sys.argv[1] if len(sys.argv) > 1 else None)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Startup-time benchmark for Simple File Explorer.
+
+Launches the explorer in fresh interpreter processes and measures, from the start of the
+import of `SimpleFileExplorer`:
+
+- first idle: the Tk event loop has drawn the window and gone idle for the first time
+- tree shown: the given folder is listed in the tree and no listing or chunked insert is pending
+
+Usage:
+    python benchmarks/startup.py FOLDER [--runs N] [--cold]
+
+Each run is a separate process, so module imports and the icon cache behave as on a real
+launch. The runs share a temporary cache directory, passed to them as `XDG_CACHE_HOME`,
+so the user's own session and indexes are never touched. The first run measures a cold
+start; later runs restore the tree from the session snapshot that the previous run saved
+on close. With --cold, the temporary cache is wiped before every run.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(folder_path):
+    """
+    Launches the explorer once in this process and prints the timings as JSON.
+
+    Args:
+        folder_path (str): The folder to open at startup.
+    """
+    start = time.perf_counter()
+    sys.path.insert(0, REPO_DIR)
+    import tkinter as tk
+    from SimpleFileExplorer import FileExplorer
+
+    timings = {}
+    root = tk.Tk()
+    app = FileExplorer(root, folder_path)
+
+    def first_idle():
+        timings['first_idle'] = time.perf_counter() - start
+
+    def check_tree():
+        loading = any(state['job'] is not None or state['entries'] is None for state in app.page_state.values())
+        if app.tree.get_children() and not loading:
+            timings['tree_shown'] = time.perf_counter() - start
+            app.on_close()
+            return
+        root.after(1, check_tree)
+
+    root.after_idle(first_idle)
+    root.after(1, check_tree)
+    root.mainloop()
+    print(json.dumps(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('folder', help='folder to open at startup')
+    parser.add_argument('--runs', type=int, default=5, help='number of launches to measure')
+    parser.add_argument('--cold', action='store_true', help='start every launch with an empty cache')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure(args.folder)
+        return
+
+    cache_home = tempfile.mkdtemp(prefix='explorer-startup-')
+    env = dict(os.environ, XDG_CACHE_HOME=cache_home)
+    results = []
+    try:
+        for _ in range(args.runs):
+            if args.cold:
+                shutil.rmtree(cache_home)
+                os.makedirs(cache_home)
+            output = subprocess.run([sys.executable, __file__, '--child', args.folder],
+                                    check=True, capture_output=True, text=True, env=env).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(cache_home, ignore_errors=True)
+
+    for key, label in (('first_idle', 'import to first idle'), ('tree_shown', 'import to tree shown')):
+        values = [result[key] * 1000 for result in results]
+        print(f'{label:22s} median {statistics.median(values):8.1f} ms   '
+              f'min {min(values):8.1f} ms   max {max(values):8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
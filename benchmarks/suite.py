@@ -0,0 +1,252 @@
+"""
+Benchmark suite for the headless explorer model.
+
+Generates synthetic folder trees and times the explorer's hot paths on each of them,
+comparing the original implementation ("legacy", reproduced below) with `ExplorerModel`
+on a cold cache and on a warm cache:
+
+- populate: list every directory of the tree
+- select:   count a folder's direct entries and load its README
+- metadata: compute the total size of the tree
+- save:     write the README back to disk
+
+Trees:
+
+- deep:        a chain of nested folders with a few files each
+- wide:        a single folder with many files
+- tiny:        many folders full of tiny files
+- huge_readme: a folder whose README.md is several megabytes
+
+Usage:
+    python benchmarks/suite.py [--scale S] [--trees deep,wide,...] [--repeat N]
+
+Reports the best time of N repeats, the throughput and the peak Python memory
+allocated by each operation (measured with tracemalloc in a separate run).
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from explorer_model import ExplorerModel
+
+
+def make_deep(root, scale):
+    path = root
+    for depth in range(int(200 * scale)):
+        path = os.path.join(path, f'level{depth}')
+        os.mkdir(path)
+        for number in range(5):
+            with open(os.path.join(path, f'file{number}.txt'), 'w') as file:
+                file.write('x' * 100)
+
+
+def make_wide(root, scale):
+    for number in range(int(50000 * scale)):
+        with open(os.path.join(root, f'sample_{number}.dat'), 'w') as file:
+            file.write('x' * 10)
+
+
+def make_tiny(root, scale):
+    for folder in range(int(200 * scale)):
+        path = os.path.join(root, f'folder{folder}')
+        os.mkdir(path)
+        for number in range(200):
+            open(os.path.join(path, f'f{number}'), 'w').close()
+
+
+def make_huge_readme(root, scale):
+    line = '| sample | 0.123456 | 0.654321 | calibrated | notes about this measurement |\n'
+    with open(os.path.join(root, 'README.md'), 'w') as file:
+        file.write('# Measurements\n' + line * int(100000 * scale))
+
+
+TREES = {
+    'deep': make_deep,
+    'wide': make_wide,
+    'tiny': make_tiny,
+    'huge_readme': make_huge_readme,
+}
+
+
+# The original implementation, kept for comparison
+
+def legacy_populate(path):
+    count = 0
+    for item in os.listdir(path):
+        if item == '.DS_Store':
+            continue
+        count += 1
+        item_path = os.path.join(path, item)
+        if os.path.isdir(item_path):
+            count += legacy_populate(item_path)
+    return count
+
+
+def legacy_select(path):
+    for root, dirs, files in os.walk(path):
+        count = len([f for f in files if f != '.DS_Store']) + len(dirs)
+        break
+    content = legacy_read_readme(path)
+    return count + len(content)
+
+
+def legacy_metadata(path):
+    total_size = 0
+    for root, dirs, files in os.walk(path):
+        break
+    for root, dirs, files in os.walk(path):
+        total_size += sum(os.path.getsize(os.path.join(root, name)) for name in files if name != '.DS_Store')
+    return total_size
+
+
+def legacy_read_readme(path):
+    readme_path = os.path.join(path, 'README.md')
+    if not os.path.exists(readme_path):
+        with open(readme_path, "w") as readme:
+            readme.write("# This is a new README file.")
+    with open(readme_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def legacy_save(path, content):
+    with open(os.path.join(path, 'README.md'), 'w', encoding='utf-8') as file:
+        file.write(content)
+    return len(content)
+
+
+# The same operations on the explorer model
+
+def model_populate(model, path):
+    count = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        for name, is_dir, is_link, size in model.list_dir(current):
+            count += 1
+            if is_dir and not is_link:
+                stack.append(os.path.join(current, name))
+    return count
+
+
+def model_select(model, path):
+    num_files, num_dirs = model.counts(path)
+    content = model.read_readme(model.find_readme(path))
+    return num_files + num_dirs + len(content)
+
+
+def model_metadata(model, path):
+    return model.folder_size(path)
+
+
+def model_save(model, path, content):
+    model.save_readme(os.path.join(path, 'README.md'), content)
+    return len(content)
+
+
+def count_entries(path):
+    return sum(len(dirs) + len(files) for root, dirs, files in os.walk(path))
+
+
+def measure(function, repeat):
+    """
+    Runs a function `repeat` times and returns the best time and its peak memory.
+
+    Args:
+        function (callable): The operation to measure.
+        repeat (int): The number of timed runs.
+
+    Returns:
+        tuple: `(best_seconds, peak_bytes)`.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_tree(name, scale, repeat, report):
+    """
+    Generates one synthetic tree and measures every operation on it.
+
+    Args:
+        name (str): A key of `TREES`.
+        scale (float): Multiplier for the size of the tree.
+        repeat (int): The number of timed runs per measurement.
+        report (callable): Receives `(tree, operation, variant, seconds, throughput, peak)`.
+    """
+    workdir = tempfile.mkdtemp(prefix='sfe-bench-')
+    try:
+        root = os.path.join(workdir, name)
+        os.mkdir(root)
+        TREES[name](root, scale)
+        entries = count_entries(root)
+        content = legacy_read_readme(root)
+        megabytes = len(content.encode('utf-8')) / (1024 * 1024)
+
+        operations = [
+            ('populate', lambda: legacy_populate(root), lambda model: model_populate(model, root), entries, 'entries/s'),
+            ('select', lambda: legacy_select(root), lambda model: model_select(model, root), 1, 'selects/s'),
+            ('metadata', lambda: legacy_metadata(root), lambda model: model_metadata(model, root), entries, 'entries/s'),
+            ('save', lambda: legacy_save(root, content), lambda model: model_save(model, root, content), megabytes, 'MB/s'),
+        ]
+        for operation, legacy, current, amount, unit in operations:
+            seconds, peak = measure(legacy, repeat)
+            report(name, operation, 'legacy', seconds, amount / seconds, unit, peak)
+
+            # A fresh cache for every cold run
+            def cold():
+                cache_dir = tempfile.mkdtemp(prefix='sfe-cache-')
+                model = ExplorerModel(root, cache_dir)
+                try:
+                    current(model)
+                finally:
+                    model.close()
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+            seconds, peak = measure(cold, repeat)
+            report(name, operation, 'cold', seconds, amount / seconds, unit, peak)
+
+            cache_dir = tempfile.mkdtemp(prefix='sfe-cache-')
+            model = ExplorerModel(root, cache_dir)
+            try:
+                model_populate(model, root)
+                model.folder_size(root)
+                seconds, peak = measure(lambda: current(model), repeat)
+                report(name, operation, 'warm', seconds, amount / seconds, unit, peak)
+            finally:
+                model.close()
+                shutil.rmtree(cache_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for the size of the trees')
+    parser.add_argument('--trees', default=','.join(TREES), help='comma-separated trees to run')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per measurement')
+    args = parser.parse_args()
+
+    print(f'{"tree":12s} {"operation":10s} {"variant":8s} {"time":>12s} {"throughput":>22s} {"peak memory":>14s}')
+
+    def report(tree, operation, variant, seconds, throughput, unit, peak):
+        print(f'{tree:12s} {operation:10s} {variant:8s} {seconds * 1000:9.1f} ms '
+              f'{throughput:12,.0f} {unit:9s} {peak / 1024:11,.0f} KB', flush=True)
+
+    for name in args.trees.split(','):
+        run_tree(name, args.scale, args.repeat, report)
+
+
+if __name__ == '__main__':
+    main()
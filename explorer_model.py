@@ -0,0 +1,2300 @@
+import bisect
+import codecs
+import collections
+import concurrent.futures
+import contextlib
+import ctypes
+import ctypes.util
+import functools
+import hashlib
+import heapq
+import io
+import json
+import math
+import multiprocessing
+import os
+import re
+import select
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+
+def natural_sort_key(name, is_dir):
+    """
+    Sort key that orders folders before files and compares embedded numbers numerically.
+
+    Args:
+        name (str): The file or directory name.
+        is_dir (bool): Whether the entry is a directory.
+
+    Returns:
+        tuple: A key such that "file2" sorts before "file10".
+    """
+    # re.split puts the captured digit runs at the odd indices
+    parts = re.split(r'(\d+)', name.casefold())
+    return (not is_dir, [int(part) if index % 2 else part for index, part in enumerate(parts)], name)
+
+
+def sort_entries(entries):
+    """
+    Sorts directory entries with folders first and in natural order within each group.
+
+    Args:
+        entries (list): `(name, is_dir, is_link, size)` tuples.
+
+    Returns:
+        list: The sorted entries.
+    """
+    return sorted(entries, key=lambda entry: natural_sort_key(entry[0], entry[1]))
+
+
+def cache_directory(cache_dir=None, subdir=None):
+    """
+    Returns the application's cache directory, creating it if needed.
+
+    Args:
+        cache_dir (str, optional): The cache directory, by default
+            `$XDG_CACHE_HOME/simple-file-explorer` or `~/.cache/simple-file-explorer`.
+        subdir (str, optional): A subdirectory of the cache directory to return instead.
+
+    Returns:
+        str: The cache directory path.
+    """
+    if cache_dir is None:
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        cache_dir = os.path.join(cache_home, 'simple-file-explorer')
+    if subdir is not None:
+        cache_dir = os.path.join(cache_dir, subdir)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def cache_file(root_path, suffix, cache_dir=None):
+    """
+    Returns the path of a cache file belonging to an opened root folder.
+
+    Args:
+        root_path (str): The normalized absolute path of the opened root folder.
+        suffix (str): The file name suffix, e.g. '.sqlite'.
+        cache_dir (str, optional): The cache directory, see `cache_directory`.
+
+    Returns:
+        str: A path inside the cache directory.
+    """
+    key = hashlib.sha1(root_path.encode('utf-8', 'surrogateescape')).hexdigest()
+    return os.path.join(cache_directory(cache_dir), key + suffix)
+
+
+class Profiler:
+    """
+    Lightweight, runtime-switchable timing and counting hooks for the explorer's hot paths.
+
+    While disabled, `span` returns a shared no-op context manager and `count` returns
+    immediately, so instrumented code pays almost nothing. While enabled, every span is
+    recorded as a complete event in a bounded ring buffer, the most recent durations are
+    kept per span name for percentiles, and named counters are accumulated. The recorded
+    events can be exported in the Chrome trace-event format (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, max_events=20000, max_samples=500):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.max_samples = max_samples
+        self.events = collections.deque(maxlen=max_events)
+        self.samples = {}
+        self.counters = collections.Counter()
+        self.epoch_ns = time.perf_counter_ns()
+        self.null_span = contextlib.nullcontext()
+
+    def reset(self):
+        """
+        Discards all recorded events, samples and counters.
+        """
+        with self.lock:
+            self.events.clear()
+            self.samples = {}
+            self.counters = collections.Counter()
+
+    def span(self, name, category='explorer'):
+        """
+        Returns a context manager that times the enclosed block under the given name.
+
+        Args:
+            name (str): The span name, e.g. 'index.scan'.
+            category (str): The trace category, e.g. 'ui' for work on the Tk main thread.
+        """
+        if not self.enabled:
+            return self.null_span
+        return ProfilerSpan(self, name, category)
+
+    def count(self, name, amount=1):
+        """
+        Adds to a named counter.
+
+        Args:
+            name (str): The counter name, e.g. 'bytes_written'.
+            amount (int): The amount to add.
+        """
+        if self.enabled:
+            with self.lock:
+                self.counters[name] += amount
+
+    def record(self, name, category, start_ns, duration_ns):
+        """
+        Records a finished span. Called by `ProfilerSpan`.
+        """
+        with self.lock:
+            self.events.append((name, category, start_ns, duration_ns, threading.get_ident()))
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = collections.deque(maxlen=self.max_samples)
+            samples.append(duration_ns)
+            if category == 'ui':
+                self.counters['ui_blocked_ms'] += duration_ns / 1e6
+
+    def summary(self):
+        """
+        Returns latency statistics of the most recent spans, per span name.
+
+        Returns:
+            list: `(name, count, p50_ms, p90_ms, p99_ms, max_ms)` tuples sorted by name.
+        """
+        with self.lock:
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+        rows = []
+        for name, values in sorted(samples.items()):
+            percentile = lambda fraction: values[min(int(fraction * len(values)), len(values) - 1)] / 1e6
+            rows.append((name, len(values), percentile(0.5), percentile(0.9), percentile(0.99), values[-1] / 1e6))
+        return rows
+
+    def export_chrome_trace(self, path):
+        """
+        Writes the recorded spans and the current counters as a Chrome trace-event JSON file.
+
+        Args:
+            path (str): The output file path.
+        """
+        pid = os.getpid()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        with self.lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        trace = []
+        for ident in {event[4] for event in events}:
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': ident,
+                          'args': {'name': names.get(ident, f'thread-{ident}')}})
+        for name, category, start_ns, duration_ns, ident in events:
+            trace.append({'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': ident,
+                          'ts': (start_ns - self.epoch_ns) / 1000, 'dur': duration_ns / 1000})
+        end_ts = (max((event[2] + event[3] for event in events), default=self.epoch_ns) - self.epoch_ns) / 1000
+        for name, value in counters.items():
+            trace.append({'name': name, 'ph': 'C', 'pid': pid, 'ts': end_ts, 'args': {name: value}})
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, file)
+
+
+class ProfilerSpan:
+    """
+    Context manager timing one block for a `Profiler`.
+    """
+
+    def __init__(self, profiler, name, category):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.category, self.start_ns, time.perf_counter_ns() - self.start_ns)
+        return False
+
+
+# Shared by the model and the view; switched on from the performance panel
+profiler = Profiler()
+
+
+class FolderAnalytics:
+    """
+    Mergeable summary of the files below a directory, computed in the same walk as its totals.
+
+    The summary takes bounded space however large the tree is: the `top_k` largest files
+    are kept in a min-heap, extensions beyond the `max_extensions` largest are folded into
+    one '(other)' bucket, and modification times, depth and fan-out are kept as extremes
+    and sums only. Paths are relative to the summarized directory, so a child's summary is
+    merged into its parent's by prefixing the child's name. The depth of a file is the
+    number of components of its relative path: files directly in the directory are at
+    depth 1, and `max_depth` is the depth of the deepest file, 0 if there are none.
+    """
+
+    top_k = 10
+    max_extensions = 40
+
+    def __init__(self):
+        self.size = 0
+        self.files = 0
+        self.dirs = 0
+        self.extensions = {}
+        self.largest = []
+        self.newest = None
+        self.oldest = None
+        self.max_depth = 0
+        self.depth_sum = 0
+        self.folders = 1
+        self.entries = 0
+        self.max_fanout = (0, '')
+
+    @staticmethod
+    def join(name, path):
+        return os.path.join(name, path) if path else name
+
+    def add_entries(self, entries, mtimes):
+        """
+        Adds the direct entries of the summarized directory.
+
+        Args:
+            entries (list): `(name, is_dir, is_link, size)` tuples as returned by `DirectoryIndex.scan`.
+            mtimes (dict): The modification times of the files in nanoseconds, by name.
+        """
+        self.entries += len(entries)
+        if len(entries) > self.max_fanout[0]:
+            self.max_fanout = (len(entries), '')
+        for name, is_dir, is_link, size in entries:
+            if is_dir:
+                self.dirs += 1
+                continue
+            self.size += size
+            self.files += 1
+            self.depth_sum += 1
+            self.max_depth = max(self.max_depth, 1)
+            bucket = self.extensions.setdefault(os.path.splitext(name)[1].lower() or '(none)', [0, 0])
+            bucket[0] += size
+            bucket[1] += 1
+            self.push_largest(size, name)
+            mtime_ns = mtimes.get(name)
+            if mtime_ns:
+                self.add_mtime(mtime_ns, name)
+        self.compact()
+
+    def merge(self, name, child):
+        """
+        Adds the summary of a subdirectory.
+
+        Args:
+            name (str): The subdirectory's name.
+            child (FolderAnalytics): The subdirectory's summary.
+        """
+        self.size += child.size
+        self.files += child.files
+        self.dirs += child.dirs
+        for extension, (size, count) in child.extensions.items():
+            bucket = self.extensions.setdefault(extension, [0, 0])
+            bucket[0] += size
+            bucket[1] += count
+        for size, path in child.largest:
+            self.push_largest(size, self.join(name, path))
+        for mtime_ns, path in filter(None, (child.newest, child.oldest)):
+            self.add_mtime(mtime_ns, self.join(name, path))
+        if child.max_depth:
+            self.max_depth = max(self.max_depth, child.max_depth + 1)
+        self.depth_sum += child.depth_sum + child.files
+        self.folders += child.folders
+        self.entries += child.entries
+        if child.max_fanout[0] > self.max_fanout[0]:
+            self.max_fanout = (child.max_fanout[0], self.join(name, child.max_fanout[1]))
+        self.compact()
+
+    def push_largest(self, size, path):
+        if len(self.largest) < self.top_k:
+            heapq.heappush(self.largest, (size, path))
+        elif size > self.largest[0][0]:
+            heapq.heapreplace(self.largest, (size, path))
+
+    def add_mtime(self, mtime_ns, path):
+        if self.newest is None or mtime_ns > self.newest[0]:
+            self.newest = (mtime_ns, path)
+        if self.oldest is None or mtime_ns < self.oldest[0]:
+            self.oldest = (mtime_ns, path)
+
+    def compact(self):
+        """
+        Folds the smallest extension buckets into '(other)' once there are too many.
+        """
+        if len(self.extensions) <= self.max_extensions:
+            return
+        other = self.extensions.pop('(other)', [0, 0])
+        ranked = sorted(self.extensions.items(), key=lambda item: item[1][0], reverse=True)
+        self.extensions = dict(ranked[:self.max_extensions - 1])
+        for extension, (size, count) in ranked[self.max_extensions - 1:]:
+            other[0] += size
+            other[1] += count
+        self.extensions['(other)'] = other
+
+    def by_extension(self):
+        """
+        Returns `(extension, size, count)` tuples, largest total size first.
+        """
+        return sorted(((extension, size, count) for extension, (size, count) in self.extensions.items()),
+                      key=lambda item: item[1], reverse=True)
+
+    def largest_files(self):
+        """
+        Returns `(size, relative_path)` tuples of the largest files, largest first.
+        """
+        return sorted(self.largest, reverse=True)
+
+    def to_json(self):
+        return json.dumps([self.size, self.files, self.dirs, self.extensions, self.largest, self.newest,
+                           self.oldest, self.max_depth, self.depth_sum, self.folders, self.entries,
+                           self.max_fanout])
+
+    @classmethod
+    def from_json(cls, data):
+        analytics = cls()
+        (analytics.size, analytics.files, analytics.dirs, analytics.extensions, largest, newest, oldest,
+         analytics.max_depth, analytics.depth_sum, analytics.folders, analytics.entries,
+         max_fanout) = json.loads(data)
+        analytics.largest = [tuple(item) for item in largest]
+        heapq.heapify(analytics.largest)
+        analytics.newest = tuple(newest) if newest else None
+        analytics.oldest = tuple(oldest) if oldest else None
+        analytics.max_fanout = tuple(max_fanout)
+        return analytics
+
+
+class DirectoryIndex:
+    """
+    Persistent on-disk index of a directory tree, stored as an SQLite file in the user's cache directory.
+
+    For every directory that has been scanned the index keeps its entries, its modification
+    time and its recursive size and counts. A directory is rescanned only when its mtime
+    differs from the stored one; changes in its direct contents are rolled up to the stored
+    totals of its ancestors. The `FolderAnalytics` of every walked directory are stored as
+    well and dropped, together with those of its ancestors, whenever it changes. Note that
+    a directory's mtime only changes when entries are added, removed or renamed, not when
+    an existing file is rewritten in place.
+
+    All methods are safe to call from several threads. Once the index is closed, `scan`
+    returns None and `totals` behaves as if cancelled, so background walks of a folder that
+    is no longer open simply stop.
+    """
+
+    # Bumped whenever the tables or the stored analytics change; older cache files are rebuilt from scratch
+    schema_version = 3
+
+    def __init__(self, root_path, cache_dir=None):
+        self.root_path = os.path.normpath(os.path.abspath(root_path))
+        self.db_path = cache_file(self.root_path, '.sqlite', cache_dir)
+
+        self.lock = threading.RLock()
+        self.closed = False
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        if self.db.execute('PRAGMA user_version').fetchone()[0] != self.schema_version:
+            self.db.executescript('DROP TABLE IF EXISTS dirs; DROP TABLE IF EXISTS entries;')
+            self.db.execute(f'PRAGMA user_version = {self.schema_version}')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER,
+                own_size INTEGER,
+                own_files INTEGER,
+                own_dirs INTEGER,
+                total_size INTEGER,
+                total_files INTEGER,
+                total_dirs INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                dir TEXT,
+                name TEXT,
+                is_dir INTEGER,
+                is_link INTEGER,
+                size INTEGER,
+                mtime_ns INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS entries_dir ON entries (dir);
+            CREATE TABLE IF NOT EXISTS analytics (
+                path TEXT PRIMARY KEY,
+                data TEXT
+            );
+        """)
+        self.db.commit()
+
+    def close(self):
+        """
+        Commits pending changes and closes the database connection.
+        """
+        with self.lock:
+            self.closed = True
+            self.db.commit()
+            self.db.close()
+
+    def scan(self, path, commit=True):
+        """
+        Returns the entries of the given directory, rescanning it only if its mtime changed.
+
+        Args:
+            path (str): The directory to list.
+            commit (bool): Whether to commit the database after a rescan.
+
+        Returns:
+            list: `(name, is_dir, is_link, size)` tuples in directory order, or None if the
+                  directory cannot be read.
+        """
+        with profiler.span('index.scan'):
+            path = os.path.normpath(path)
+            profiler.count('syscalls')
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                return None
+            with self.lock:
+                if self.closed:
+                    return None
+                row = self.db.execute('SELECT mtime_ns FROM dirs WHERE path = ?', (path,)).fetchone()
+                if row is not None and row[0] == mtime_ns:
+                    return self.db.execute(
+                        'SELECT name, is_dir, is_link, size FROM entries WHERE dir = ? ORDER BY rowid',
+                        (path,)).fetchall()
+
+            entries = []
+            mtimes = []
+            profiler.count('syscalls')
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.name == '.DS_Store':
+                            continue
+                        try:
+                            is_dir = entry.is_dir()
+                            is_link = entry.is_symlink()
+                            stat = None if is_dir else entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((entry.name, int(is_dir), int(is_link), stat.st_size if stat else 0))
+                        mtimes.append(stat.st_mtime_ns if stat else 0)
+            except OSError:
+                return None
+            profiler.count('syscalls', sum(1 for entry in entries if not entry[1]))
+            profiler.count('dirs_rescanned')
+
+            with self.lock:
+                if self.closed:
+                    return None
+                self.store_entries(path, mtime_ns, entries, mtimes)
+                if commit:
+                    self.db.commit()
+            return entries
+
+    def store_entries(self, path, mtime_ns, entries, mtimes):
+        """
+        Replaces the stored entries of a directory and rolls the change up to its ancestors.
+
+        Subdirectories that disappeared are dropped from the index together with their
+        descendants. Must be called with `lock` held.
+
+        Args:
+            path (str): The normalized directory path.
+            mtime_ns (int): The directory's current modification time.
+            entries (list): `(name, is_dir, is_link, size)` tuples as returned by `scan`.
+            mtimes (list): The modification times of the entries, 0 for directories.
+        """
+        self.drop_analytics(path)
+        own_size = sum(size for name, is_dir, is_link, size in entries if not is_dir)
+        own_files = sum(1 for entry in entries if not entry[1])
+        own_dirs = len(entries) - own_files
+
+        row = self.db.execute(
+            'SELECT own_size, own_files, own_dirs, total_size FROM dirs WHERE path = ?', (path,)).fetchone()
+        delta = [own_size, own_files, own_dirs]
+        if row is not None:
+            delta = [own_size - row[0], own_files - row[1], own_dirs - row[2]]
+            new_dirs = {name for name, is_dir, is_link, size in entries if is_dir}
+            old_dirs = self.db.execute(
+                'SELECT name FROM entries WHERE dir = ? AND is_dir = 1', (path,)).fetchall()
+            for (name,) in old_dirs:
+                if name not in new_dirs:
+                    removed = self.forget(os.path.join(path, name))
+                    delta = [d - r for d, r in zip(delta, removed)]
+
+        self.db.execute('DELETE FROM entries WHERE dir = ?', (path,))
+        self.db.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                            [(path,) + entry + (mtime,) for entry, mtime in zip(entries, mtimes)])
+        if row is None:
+            self.db.execute('INSERT INTO dirs VALUES (?, ?, ?, ?, ?, NULL, NULL, NULL)',
+                            (path, mtime_ns, own_size, own_files, own_dirs))
+        else:
+            self.db.execute('UPDATE dirs SET mtime_ns = ?, own_size = ?, own_files = ?, own_dirs = ? WHERE path = ?',
+                            (mtime_ns, own_size, own_files, own_dirs, path))
+            if row[3] is not None:
+                self.roll_up(path, delta)
+
+    def forget(self, path):
+        """
+        Removes a directory and all of its descendants from the index.
+
+        Must be called with `lock` held.
+
+        Args:
+            path (str): The normalized directory path.
+
+        Returns:
+            list: The stored `[total_size, total_files, total_dirs]` of the removed directory.
+        """
+        row = self.db.execute(
+            'SELECT total_size, total_files, total_dirs FROM dirs WHERE path = ?', (path,)).fetchone()
+        lower, upper = path + os.sep, path + chr(ord(os.sep) + 1)
+        self.db.execute('DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)', (path, lower, upper))
+        self.db.execute('DELETE FROM entries WHERE dir = ? OR (dir >= ? AND dir < ?)', (path, lower, upper))
+        self.db.execute('DELETE FROM analytics WHERE path = ? OR (path >= ? AND path < ?)', (path, lower, upper))
+        if row is None or row[0] is None:
+            return [0, 0, 0]
+        return list(row)
+
+    def roll_up(self, path, delta):
+        """
+        Adds a change in size and counts to the stored totals of a directory and its ancestors.
+
+        Must be called with `lock` held.
+
+        Args:
+            path (str): The normalized directory path whose contents changed.
+            delta (list): The `[size, files, dirs]` difference.
+        """
+        if not any(delta):
+            return
+        while True:
+            self.db.execute(
+                'UPDATE dirs SET total_size = total_size + ?, total_files = total_files + ?, '
+                'total_dirs = total_dirs + ? WHERE path = ? AND total_size IS NOT NULL',
+                (*delta, path))
+            if path == self.root_path or len(path) <= len(self.root_path):
+                break
+            path = os.path.dirname(path)
+
+    def drop_analytics(self, path):
+        """
+        Removes the stored `FolderAnalytics` of a directory and of all its ancestors.
+
+        Must be called with `lock` held.
+
+        Args:
+            path (str): The normalized directory path whose contents changed.
+        """
+        paths = [path]
+        while len(path) > len(self.root_path):
+            path = os.path.dirname(path)
+            paths.append(path)
+        self.db.execute(f'DELETE FROM analytics WHERE path IN ({", ".join("?" * len(paths))})', paths)
+
+    def invalidate(self, path):
+        """
+        Forces the next `scan` of a directory to rescan it even if its mtime is unchanged.
+
+        Used when a file inside the directory was rewritten in place.
+
+        Args:
+            path (str): The directory path.
+        """
+        path = os.path.normpath(path)
+        with self.lock:
+            if not self.closed:
+                self.db.execute('UPDATE dirs SET mtime_ns = NULL WHERE path = ?', (path,))
+                self.drop_analytics(path)
+
+    def commit(self):
+        """
+        Commits changes made by `scan` calls with `commit=False`.
+        """
+        with self.lock:
+            if not self.closed:
+                self.db.commit()
+
+    def cached_totals(self, path):
+        """
+        Returns the last known recursive totals of a directory without touching the disk.
+
+        Args:
+            path (str): The directory path.
+
+        Returns:
+            tuple: `(total_size, total_files, total_dirs)`, or None if not yet computed.
+        """
+        with self.lock:
+            if self.closed:
+                return None
+            row = self.db.execute('SELECT total_size, total_files, total_dirs FROM dirs WHERE path = ?',
+                                  (os.path.normpath(path),)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return row
+
+    def cached_analytics(self, path):
+        """
+        Returns the stored `FolderAnalytics` of a directory without touching the disk.
+
+        Args:
+            path (str): The directory path.
+
+        Returns:
+            FolderAnalytics: The summary of the last walk, or None if the directory was not
+                             walked since it last changed.
+        """
+        with self.lock:
+            if self.closed:
+                return None
+            row = self.db.execute('SELECT data FROM analytics WHERE path = ?', (os.path.normpath(path),)).fetchone()
+        return None if row is None else FolderAnalytics.from_json(row[0])
+
+    def same_size_files(self, min_size=1):
+        """
+        Returns the indexed regular files that share their size with another file.
+
+        Only directories that have been scanned are covered; run `totals` first to bring
+        the whole tree up to date. Symbolic links are left out.
+
+        Args:
+            min_size (int): The smallest file size in bytes to consider.
+
+        Returns:
+            dict: Lists of file paths by size in bytes.
+        """
+        with self.lock:
+            if self.closed:
+                return {}
+            rows = self.db.execute(
+                'SELECT size, dir, name FROM entries WHERE is_dir = 0 AND is_link = 0 AND size IN '
+                '(SELECT size FROM entries WHERE is_dir = 0 AND is_link = 0 AND size >= ? '
+                'GROUP BY size HAVING COUNT(*) > 1)', (min_size,)).fetchall()
+        groups = collections.defaultdict(list)
+        for size, directory, name in rows:
+            groups[size].append(os.path.join(directory, name))
+        return groups
+
+    def cached_counts(self, path):
+        """
+        Returns the last known number of files and of directories directly within a
+        directory without touching the disk.
+
+        Args:
+            path (str): The directory path.
+
+        Returns:
+            tuple: `(num_files, num_dirs)`, or None if the directory was never scanned.
+        """
+        path = os.path.normpath(path)
+        with self.lock:
+            if self.closed:
+                return None
+            if self.db.execute('SELECT 1 FROM dirs WHERE path = ?', (path,)).fetchone() is None:
+                return None
+            num_entries, num_dirs = self.db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(is_dir), 0) FROM entries WHERE dir = ?', (path,)).fetchone()
+        return num_entries - num_dirs, num_dirs
+
+    def totals(self, path, cancelled=None, progress=None):
+        """
+        Computes the recursive size and counts of a directory, see `analyze`.
+
+        Args:
+            path (str): The directory path.
+            cancelled (callable, optional): Returns True when the walk should be abandoned.
+            progress (callable, optional): Called with the running size total in bytes.
+
+        Returns:
+            tuple: `(total_size, total_files, total_dirs)`, or None if the walk was cancelled.
+        """
+        analytics = self.analyze(path, cancelled, progress)
+        return None if analytics is None else (analytics.size, analytics.files, analytics.dirs)
+
+    def analyze(self, path, cancelled=None, progress=None):
+        """
+        Computes the `FolderAnalytics` of a directory in one walk, validating every subdirectory.
+
+        Each subdirectory costs one `stat` call; only directories whose mtime changed are
+        rescanned. Symbolic links to directories are not followed. The summaries are built
+        bottom-up and stored per directory, and the recursive totals are updated along the
+        way. A directory whose stored summary survived the validation of its subtree is not
+        summarized again, and the stored summaries of its subdirectories are not even loaded.
+        Apart from the walk's stack, only the summaries of finished subdirectories of the
+        directories on the current path are held in memory.
+
+        Args:
+            path (str): The directory path.
+            cancelled (callable, optional): Returns True when the walk should be abandoned.
+            progress (callable, optional): Called with the running size total in bytes.
+
+        Returns:
+            FolderAnalytics: The summary, or None if the walk was cancelled.
+        """
+        with profiler.span('index.analyze'):
+            path = os.path.normpath(path)
+            counted = 0
+            # Finished directories: a FolderAnalytics, or the stored JSON until it is needed
+            results = {}
+            stack = [(path, None)]
+            pending = 0
+            while stack:
+                if self.closed or (cancelled is not None and cancelled()):
+                    self.commit()
+                    return None
+                current, entries = stack.pop()
+                if entries is None:
+                    entries = self.scan(current, commit=False)
+                    if entries is None:
+                        results[current] = FolderAnalytics()
+                        continue
+                    stack.append((current, entries))
+                    for name, is_dir, is_link, size in entries:
+                        if is_dir and not is_link:
+                            stack.append((os.path.join(current, name), None))
+                    counted += sum(size for name, is_dir, is_link, size in entries if not is_dir)
+                    if progress is not None:
+                        progress(counted)
+                    continue
+
+                with self.lock:
+                    if self.closed:
+                        return None
+                    row = self.db.execute('SELECT data FROM analytics WHERE path = ?', (current,)).fetchone()
+                    if row is None:
+                        mtimes = dict(self.db.execute(
+                            'SELECT name, mtime_ns FROM entries WHERE dir = ? AND is_dir = 0', (current,)))
+                children = [(name, os.path.join(current, name)) for name, is_dir, is_link, size in entries
+                            if is_dir and not is_link]
+                if row is not None:
+                    for name, child_path in children:
+                        results.pop(child_path, None)
+                    results[current] = row[0]
+                    continue
+
+                analytics = FolderAnalytics()
+                analytics.add_entries(entries, mtimes)
+                for name, child_path in children:
+                    child = results.pop(child_path, None)
+                    if isinstance(child, str):
+                        child = FolderAnalytics.from_json(child)
+                    if child is not None:
+                        analytics.merge(name, child)
+                results[current] = analytics
+                with self.lock:
+                    if self.closed:
+                        return None
+                    self.db.execute('UPDATE dirs SET total_size = ?, total_files = ?, total_dirs = ? WHERE path = ?',
+                                    (analytics.size, analytics.files, analytics.dirs, current))
+                    self.db.execute('INSERT OR REPLACE INTO analytics VALUES (?, ?)', (current, analytics.to_json()))
+                    pending += 1
+                    if pending >= 500:
+                        self.db.commit()
+                        pending = 0
+            self.commit()
+            result = results[path]
+            return FolderAnalytics.from_json(result) if isinstance(result, str) else result
+
+
+class DirectoryWatcher:
+    """
+    Base class for watching a set of directories for changes on a background thread.
+
+    Changes are batched: the directories that changed and the renames that happened are
+    collected and handed to `callback(dirty, renames)` at most once every
+    `batch_interval` seconds, from the watcher thread. `dirty` is a set of directory
+    paths whose direct contents changed, `renames` a list of `(old_path, new_path)` pairs.
+    Subclasses implement `add_watch`, `remove_watch` and `wait_events`.
+    """
+
+    def __init__(self, callback, batch_interval=0.5):
+        self.callback = callback
+        self.batch_interval = batch_interval
+        self.lock = threading.Lock()
+        self.dirty = set()
+        self.renames = []
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """
+        Starts the watcher thread.
+        """
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops the watcher thread. Pending changes are discarded.
+        """
+        self.stopped = True
+
+    def watch(self, path):
+        """
+        Starts watching the direct contents of a directory.
+
+        Args:
+            path (str): The directory path.
+        """
+        path = os.path.normpath(path)
+        with self.lock:
+            self.add_watch(path)
+
+    def unwatch(self, path):
+        """
+        Stops watching a directory and all watched directories below it.
+
+        Args:
+            path (str): The directory path.
+        """
+        path = os.path.normpath(path)
+        with self.lock:
+            for watched in self.watched_paths():
+                if watched == path or watched.startswith(path + os.sep):
+                    self.remove_watch(watched)
+
+    def mark_dirty(self, path):
+        """
+        Records that the direct contents of a directory changed. Must be called with `lock` held.
+
+        Args:
+            path (str): The directory path.
+        """
+        self.dirty.add(path)
+
+    def run(self):
+        """
+        Waits for events and flushes batches to the callback until stopped.
+        """
+        last_flush = time.monotonic()
+        while not self.stopped:
+            self.wait_events(self.batch_interval)
+            if time.monotonic() - last_flush < self.batch_interval:
+                continue
+            with self.lock:
+                dirty, renames = self.dirty, self.renames
+                self.dirty, self.renames = set(), []
+            last_flush = time.monotonic()
+            if (dirty or renames) and not self.stopped:
+                self.callback(dirty, renames)
+
+
+class InotifyWatcher(DirectoryWatcher):
+    """
+    Directory watcher backed by Linux inotify, accessed through ctypes.
+
+    The watcher thread waits on the inotify descriptor and on the read end of a pipe, so
+    that `stop` wakes it right away instead of joining it. The thread closes both
+    descriptors when it exits.
+    """
+
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+    IN_NONBLOCK = 0o4000
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                  | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, callback, batch_interval=0.5):
+        super().__init__(callback, batch_interval)
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.wake_read, self.wake_write = os.pipe()
+        self.closed = False
+        self.paths = {}
+        self.descriptors = {}
+        self.moves = {}
+
+    @classmethod
+    def available(cls):
+        """
+        Returns True if inotify can be used on this platform.
+        """
+        if not sys.platform.startswith('linux'):
+            return False
+        libc_name = ctypes.util.find_library('c')
+        return bool(libc_name) and hasattr(ctypes.CDLL(libc_name), 'inotify_init1')
+
+    def watched_paths(self):
+        return list(self.descriptors)
+
+    def add_watch(self, path):
+        if self.closed or path in self.descriptors:
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd >= 0:
+            self.paths[wd] = path
+            self.descriptors[path] = wd
+
+    def remove_watch(self, path):
+        wd = self.descriptors.pop(path, None)
+        if wd is not None and not self.closed:
+            self.paths.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def stop(self):
+        with self.lock:
+            super().stop()
+            if not self.closed:
+                os.write(self.wake_write, b'\0')
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            with self.lock:
+                self.closed = True
+                for fd in (self.fd, self.wake_read, self.wake_write):
+                    os.close(fd)
+
+    def wait_events(self, timeout):
+        """
+        Reads pending inotify events, waiting at most `timeout` seconds for the first one.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds.
+        """
+        readable, _, _ = select.select([self.fd, self.wake_read], [], [], timeout)
+        if self.fd not in readable or self.stopped:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        with self.lock:
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                self.handle_event(wd, mask, cookie, name)
+
+    def handle_event(self, wd, mask, cookie, name):
+        """
+        Translates one inotify event into dirty directories and renames. Called with `lock` held.
+        """
+        if mask & self.IN_Q_OVERFLOW:
+            self.dirty.update(self.descriptors)
+            return
+        path = self.paths.get(wd)
+        if path is None:
+            return
+        if mask & self.IN_IGNORED:
+            self.paths.pop(wd, None)
+            if self.descriptors.get(path) == wd:
+                del self.descriptors[path]
+            return
+        if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+            self.mark_dirty(os.path.dirname(path))
+            return
+        self.mark_dirty(path)
+        if mask & self.IN_MOVED_FROM:
+            self.moves[cookie] = os.path.join(path, name)
+        elif mask & self.IN_MOVED_TO and cookie in self.moves:
+            old_path, new_path = self.moves.pop(cookie), os.path.join(path, name)
+            self.mark_dirty(os.path.dirname(old_path))
+            self.renames.append((old_path, new_path))
+            if mask & self.IN_ISDIR:
+                self.rename_watches(old_path, new_path)
+
+    def rename_watches(self, old_path, new_path):
+        """
+        Rewrites the paths of watches below a renamed directory. Called with `lock` held.
+        """
+        for wd, path in list(self.paths.items()):
+            if path == old_path or path.startswith(old_path + os.sep):
+                renamed = new_path + path[len(old_path):]
+                del self.descriptors[path]
+                self.paths[wd] = renamed
+                self.descriptors[renamed] = wd
+
+
+class PollingWatcher(DirectoryWatcher):
+    """
+    Portable directory watcher that polls the mtime of every watched directory.
+
+    A directory whose mtime changed is reported as dirty; the caller diffs its contents
+    with a fresh scan. Renames cannot be told apart from a delete plus a create.
+    """
+
+    def __init__(self, callback, batch_interval=0.5, poll_interval=2.0):
+        super().__init__(callback, batch_interval)
+        self.poll_interval = poll_interval
+        self.mtimes = {}
+
+    def watched_paths(self):
+        return list(self.mtimes)
+
+    def add_watch(self, path):
+        if path not in self.mtimes:
+            try:
+                self.mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+
+    def remove_watch(self, path):
+        self.mtimes.pop(path, None)
+
+    def wait_events(self, timeout):
+        """
+        Sleeps for the poll interval, then checks every watched directory's mtime.
+
+        Args:
+            timeout (float): Ignored; polling happens every `poll_interval` seconds.
+        """
+        time.sleep(self.poll_interval)
+        with self.lock:
+            paths = list(self.mtimes.items())
+        for path, mtime_ns in paths:
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime_ns:
+                with self.lock:
+                    if current is None:
+                        self.mtimes.pop(path, None)
+                        self.mark_dirty(os.path.dirname(path))
+                    elif path in self.mtimes:
+                        self.mtimes[path] = current
+                        self.mark_dirty(path)
+
+
+def create_watcher(callback):
+    """
+    Creates the best available directory watcher for this platform.
+
+    Args:
+        callback (callable): Receives `(dirty, renames)` batches from the watcher thread.
+
+    Returns:
+        DirectoryWatcher: An `InotifyWatcher` on Linux, a `PollingWatcher` elsewhere.
+    """
+    if InotifyWatcher.available():
+        try:
+            return InotifyWatcher(callback)
+        except OSError:
+            pass
+    return PollingWatcher(callback)
+
+
+class FilenameIndex:
+    """
+    In-memory index of every file and folder name below an opened root.
+
+    Entries are stored in parallel arrays indexed by an integer entry id: the name, its
+    casefolded form, the id of its parent directory and whether it is a directory.
+    Directory paths are kept once per directory, so full paths are only assembled for
+    results. A trigram index maps every three-character substring of a casefolded name to
+    the ascending list of entry ids containing it, which makes substring queries a matter of
+    scanning the shortest posting list.
+
+    The index is filled by `build` on a background thread and kept current with
+    `update_dir`. Queries may run while it is being built; they see the entries added so far.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.names = []
+        self.lower = []
+        self.parents = array('I')
+        self.is_dir = array('b')
+        self.dirs = []
+        self.dir_ids = {}
+        self.children = []
+        self.trigrams = {}
+        self.complete = False
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def grams(text):
+        """
+        Returns the set of three-character substrings of the given text.
+        """
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def build(self, root_path, directory_index, cancelled=None):
+        """
+        Adds every entry below `root_path`, listing directories through a `DirectoryIndex`.
+
+        Args:
+            root_path (str): The opened root folder.
+            directory_index (DirectoryIndex): The index used to list directories.
+            cancelled (callable, optional): Returns True when the build should be abandoned.
+        """
+        stack = [os.path.normpath(root_path)]
+        while stack:
+            if cancelled is not None and cancelled():
+                break
+            path = stack.pop()
+            entries = directory_index.scan(path, commit=False)
+            if entries is None:
+                continue
+            with self.lock:
+                for name, is_dir, is_link, size in entries:
+                    self.add(path, name, is_dir)
+            stack.extend(os.path.join(path, name) for name, is_dir, is_link, size in entries
+                         if is_dir and not is_link)
+        directory_index.commit()
+        self.complete = True
+
+    def dir_id(self, path):
+        """
+        Returns the id of a directory path, registering it if needed. Called with `lock` held.
+        """
+        dir_id = self.dir_ids.get(path)
+        if dir_id is None:
+            dir_id = len(self.dirs)
+            self.dirs.append(path)
+            self.dir_ids[path] = dir_id
+            self.children.append({})
+        return dir_id
+
+    def add(self, dir_path, name, is_dir):
+        """
+        Adds a single entry to the index. Called with `lock` held.
+
+        Args:
+            dir_path (str): The directory containing the entry.
+            name (str): The entry name.
+            is_dir (bool): Whether the entry is a directory.
+        """
+        dir_id = self.dir_id(dir_path)
+        if name in self.children[dir_id]:
+            return
+        entry_id = len(self.names)
+        lower = name.casefold()
+        self.names.append(name)
+        self.lower.append(lower)
+        self.parents.append(dir_id)
+        self.is_dir.append(1 if is_dir else 0)
+        self.children[dir_id][name] = entry_id
+        for gram in self.grams(lower):
+            postings = self.trigrams.get(gram)
+            if postings is None:
+                postings = self.trigrams[gram] = array('I')
+            postings.append(entry_id)
+
+    def remove(self, dir_path, name):
+        """
+        Removes an entry, and the contents of a removed directory, from the index.
+
+        The entry's slot is cleared rather than reused, so posting lists stay valid; stale
+        ids are skipped at query time. Called with `lock` held.
+
+        Args:
+            dir_path (str): The directory containing the entry.
+            name (str): The entry name.
+        """
+        dir_id = self.dir_ids.get(dir_path)
+        if dir_id is None:
+            return
+        entry_id = self.children[dir_id].pop(name, None)
+        if entry_id is None:
+            return
+        self.names[entry_id] = None
+        self.lower[entry_id] = None
+        sub_path = os.path.join(dir_path, name)
+        if self.is_dir[entry_id] and sub_path in self.dir_ids:
+            for child in list(self.children[self.dir_ids[sub_path]]):
+                self.remove(sub_path, child)
+            del self.dir_ids[sub_path]
+
+    def update_dir(self, dir_path, entries):
+        """
+        Brings the entries of one directory in line with a fresh listing.
+
+        Only directories the index already knows about are updated.
+
+        Args:
+            dir_path (str): The directory path.
+            entries (list): The directory's `DirectoryIndex.scan` result.
+        """
+        with self.lock:
+            dir_id = self.dir_ids.get(dir_path)
+            if dir_id is None:
+                return
+            fresh = {name: is_dir for name, is_dir, is_link, size in entries}
+            for name in list(self.children[dir_id]):
+                if name not in fresh or bool(fresh[name]) != bool(self.is_dir[self.children[dir_id][name]]):
+                    self.remove(dir_path, name)
+            for name, is_dir in fresh.items():
+                self.add(dir_path, name, is_dir)
+
+    def rename_dir(self, old_path, new_path):
+        """
+        Rewrites the stored paths of a renamed directory and of the directories below it.
+
+        Args:
+            old_path (str): The directory's previous path.
+            new_path (str): The directory's new path.
+        """
+        with self.lock:
+            for path, dir_id in list(self.dir_ids.items()):
+                if path == old_path or path.startswith(old_path + os.sep):
+                    renamed = new_path + path[len(old_path):]
+                    del self.dir_ids[path]
+                    self.dir_ids[renamed] = dir_id
+                    self.dirs[dir_id] = renamed
+
+    def path(self, entry_id):
+        """
+        Returns the absolute path of an entry.
+        """
+        return os.path.join(self.dirs[self.parents[entry_id]], self.names[entry_id])
+
+    def search(self, query, start=0, stop=None):
+        """
+        Yields the ids of entries whose name contains `query`, ignoring case.
+
+        Queries of three or more characters scan the shortest posting list of their
+        trigrams; shorter queries scan the names directly.
+
+        Args:
+            query (str): The substring to look for.
+            start (int): The first entry id to consider.
+            stop (int, optional): The entry id to stop at, by default the current size.
+        """
+        query = query.casefold()
+        stop = len(self.names) if stop is None else stop
+        if len(query) < 3:
+            for entry_id in range(start, stop):
+                lower = self.lower[entry_id]
+                if lower is not None and query in lower:
+                    yield entry_id
+            return
+        postings = [self.trigrams.get(gram) for gram in self.grams(query)]
+        if not all(postings):
+            return
+        shortest = min(postings, key=len)
+        for position in range(bisect.bisect_left(shortest, start), len(shortest)):
+            entry_id = shortest[position]
+            if entry_id >= stop:
+                break
+            lower = self.lower[entry_id]
+            if lower is not None and query in lower:
+                yield entry_id
+
+    def fuzzy_search(self, query, limit=200):
+        """
+        Returns the ids of entries sharing most trigrams with `query`, best matches first.
+
+        Used as a fallback for queries with typos that have no substring match.
+
+        Args:
+            query (str): The approximate name to look for.
+            limit (int): The maximum number of ids to return.
+
+        Returns:
+            list: Entry ids ordered by the number of shared trigrams.
+        """
+        grams = self.grams(query.casefold())
+        if not grams:
+            return []
+        counts = collections.Counter()
+        for gram in grams:
+            counts.update(self.trigrams.get(gram, ()))
+        threshold = max(1, (len(grams) + 1) // 2)
+        return [entry_id for entry_id, count in counts.most_common()
+                if count >= threshold and self.lower[entry_id] is not None][:limit]
+
+
+class ReadmeIndex:
+    """
+    Persistent inverted index over the README.md files below an opened root.
+
+    README files are tokenized into lowercase words and stored as `(term, doc, tf)`
+    postings in an SQLite file next to the `DirectoryIndex` cache. Each document remembers
+    the mtime it was indexed at, so refreshing the index only re-tokenizes files that
+    changed. Queries are ranked with BM25; the last query word also matches as a prefix,
+    so results appear while a word is still being typed.
+
+    All methods are safe to call from several threads.
+    """
+
+    TOKEN_PATTERN = re.compile(r'\w{2,}')
+
+    def __init__(self, root_path, cache_dir=None):
+        self.root_path = os.path.normpath(os.path.abspath(root_path))
+        self.db_path = cache_file(self.root_path, '.readme.sqlite', cache_dir)
+
+        self.lock = threading.RLock()
+        self.closed = False
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE,
+                mtime_ns INTEGER,
+                length INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT,
+                doc INTEGER,
+                tf INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS postings_term ON postings (term);
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+        """)
+        self.db.commit()
+
+    def close(self):
+        """
+        Commits pending changes and closes the database connection.
+        """
+        with self.lock:
+            self.closed = True
+            self.db.commit()
+            self.db.close()
+
+    @classmethod
+    def tokenize(cls, text):
+        """
+        Splits text into lowercase words of at least two characters.
+        """
+        return cls.TOKEN_PATTERN.findall(text.casefold())
+
+    def update(self, path, content=None, commit=True):
+        """
+        Indexes a README file unless it is unchanged since it was last indexed.
+
+        Args:
+            path (str): The README file path.
+            content (str, optional): The file content, if the caller has it at hand; a file
+                whose content is passed is always re-indexed.
+            commit (bool): Whether to commit the database afterwards.
+
+        Returns:
+            bool: True if the file was (re-)indexed.
+        """
+        path = os.path.normpath(path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            self.remove(path)
+            return False
+        if content is None:
+            with self.lock:
+                if self.closed:
+                    return False
+                row = self.db.execute('SELECT mtime_ns FROM docs WHERE path = ?', (path,)).fetchone()
+            if row is not None and row[0] == mtime_ns:
+                return False
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as file:
+                    content = file.read()
+            except OSError:
+                return False
+
+        tokens = self.tokenize(content)
+        counts = collections.Counter(tokens)
+        with self.lock:
+            if self.closed:
+                return False
+            row = self.db.execute('SELECT id FROM docs WHERE path = ?', (path,)).fetchone()
+            if row is None:
+                doc = self.db.execute('INSERT INTO docs (path, mtime_ns, length) VALUES (?, ?, ?)',
+                                      (path, mtime_ns, len(tokens))).lastrowid
+            else:
+                doc = row[0]
+                self.db.execute('UPDATE docs SET mtime_ns = ?, length = ? WHERE id = ?', (mtime_ns, len(tokens), doc))
+                self.db.execute('DELETE FROM postings WHERE doc = ?', (doc,))
+            self.db.executemany('INSERT INTO postings VALUES (?, ?, ?)',
+                                [(term, doc, tf) for term, tf in counts.items()])
+            if commit:
+                self.db.commit()
+        return True
+
+    def remove(self, path, commit=True):
+        """
+        Drops a README file from the index.
+
+        Args:
+            path (str): The README file path.
+            commit (bool): Whether to commit the database afterwards.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            row = self.db.execute('SELECT id FROM docs WHERE path = ?', (os.path.normpath(path),)).fetchone()
+            if row is not None:
+                self.db.execute('DELETE FROM postings WHERE doc = ?', row)
+                self.db.execute('DELETE FROM docs WHERE id = ?', row)
+                if commit:
+                    self.db.commit()
+
+    def remove_below(self, path, keep=(), commit=True):
+        """
+        Drops the README files in the subfolders of a directory.
+
+        Args:
+            path (str): The directory path.
+            keep (iterable): Names of subfolders whose README files stay indexed.
+            commit (bool): Whether to commit the database afterwards.
+        """
+        path = os.path.normpath(path)
+        keep = set(keep)
+        lower, upper = path + os.sep, path + chr(ord(os.sep) + 1)
+        with self.lock:
+            if self.closed:
+                return
+            rows = self.db.execute('SELECT id, path FROM docs WHERE path >= ? AND path < ?', (lower, upper)).fetchall()
+            docs = [(doc,) for doc, doc_path in rows if doc_path[len(lower):].split(os.sep, 1)[0] not in keep]
+            self.db.executemany('DELETE FROM postings WHERE doc = ?', docs)
+            self.db.executemany('DELETE FROM docs WHERE id = ?', docs)
+            if commit:
+                self.db.commit()
+
+    def rename_dir(self, old_path, new_path, commit=True):
+        """
+        Rewrites the paths of the README files below a renamed directory.
+
+        Args:
+            old_path (str): The directory's previous path.
+            new_path (str): The directory's new path.
+            commit (bool): Whether to commit the database afterwards.
+        """
+        old_path, new_path = os.path.normpath(old_path), os.path.normpath(new_path)
+        self.remove_below(new_path, commit=False)
+        lower, upper = old_path + os.sep, old_path + chr(ord(os.sep) + 1)
+        with self.lock:
+            if self.closed:
+                return
+            self.db.execute('UPDATE docs SET path = ? || substr(path, ?) WHERE path >= ? AND path < ?',
+                            (new_path, len(old_path) + 1, lower, upper))
+            if commit:
+                self.db.commit()
+
+    def refresh(self, paths, cancelled=None):
+        """
+        Synchronizes the index with the complete set of README files below the root.
+
+        Files whose mtime is unchanged are skipped, and files that no longer exist are dropped.
+
+        Args:
+            paths (iterable): Every README file path currently below the root.
+            cancelled (callable, optional): Returns True when the refresh should be abandoned.
+        """
+        paths = {os.path.normpath(path) for path in paths}
+        with self.lock:
+            if self.closed:
+                return
+            known = [row[0] for row in self.db.execute('SELECT path FROM docs')]
+        for path in known:
+            if path not in paths:
+                self.remove(path, commit=False)
+        for count, path in enumerate(paths):
+            if self.closed or (cancelled is not None and cancelled()):
+                break
+            self.update(path, commit=False)
+            if count % 500 == 499:
+                self.commit()
+        self.commit()
+
+    def commit(self):
+        """
+        Commits changes made with `commit=False`.
+        """
+        with self.lock:
+            if not self.closed:
+                self.db.commit()
+
+    def search(self, query, limit=20):
+        """
+        Returns the README files best matching a query, ranked with BM25.
+
+        Args:
+            query (str): The words to look for.
+            limit (int): The maximum number of results.
+
+        Returns:
+            list: `(path, score)` tuples, best match first.
+        """
+        terms = self.tokenize(query)
+        if not terms:
+            return []
+        k1, b = 1.2, 0.75
+        with self.lock:
+            if self.closed:
+                return []
+            total, average = self.db.execute('SELECT COUNT(*), AVG(length) FROM docs').fetchone()
+            if not total:
+                return []
+            scores = collections.Counter()
+            lengths = {}
+            for position, term in enumerate(terms):
+                if position == len(terms) - 1:
+                    rows = self.db.execute(
+                        'SELECT p.doc, SUM(p.tf), d.length FROM postings p JOIN docs d ON d.id = p.doc '
+                        'WHERE p.term >= ? AND p.term < ? GROUP BY p.doc', (term, term + '\U0010ffff')).fetchall()
+                else:
+                    rows = self.db.execute(
+                        'SELECT p.doc, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc '
+                        'WHERE p.term = ?', (term,)).fetchall()
+                idf = math.log((total - len(rows) + 0.5) / (len(rows) + 0.5) + 1)
+                for doc, tf, length in rows:
+                    lengths[doc] = length
+                    scores[doc] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / (average or 1)))
+            results = []
+            for doc, score in scores.most_common(limit):
+                path = self.db.execute('SELECT path FROM docs WHERE id = ?', (doc,)).fetchone()[0]
+                results.append((path, score))
+        return results
+
+    @classmethod
+    def snippet(cls, path, query, width=120, max_chars=64 * 1024):
+        """
+        Returns a short excerpt of a README around the first occurrence of a query word.
+
+        Only the first `max_chars` characters of the file are read, so that listing results
+        stays fast for large READMEs; if no query word occurs in them, the excerpt is taken
+        from the start of the file.
+
+        Args:
+            path (str): The README file path.
+            query (str): The query the file matched.
+            width (int): The approximate length of the excerpt.
+            max_chars (int): The number of characters read from the start of the file.
+
+        Returns:
+            str: The excerpt with whitespace collapsed, or an empty string.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as file:
+                content = file.read(max_chars + 1)
+        except OSError:
+            return ''
+        truncated = len(content) > max_chars
+        content = content[:max_chars]
+        lower = content.casefold()
+        positions = [lower.find(term) for term in cls.tokenize(query)]
+        positions = [position for position in positions if position >= 0]
+        start = max(min(positions, default=0) - width // 3, 0)
+        excerpt = ' '.join(content[start:start + width].split())
+        return ('...' if start else '') + excerpt + ('...' if truncated or start + width < len(content) else '')
+
+
+class ReadmeWriter:
+    """
+    Background writer that saves README files atomically.
+
+    Submitted saves are kept per path, so a burst of edits to the same file is coalesced
+    into a single write of the latest content. Each write goes to a temporary file in the
+    same directory which then replaces the target with `os.replace`. After a successful
+    write, `on_written(path, content, token)` is called on the writer thread; `content` is
+    None for saves that carried a tail. A write that fails, with an `OSError` or any other
+    exception, calls `on_failed(path, error, token)` instead. `token` is the value given to `submit`, so that the caller can tell
+    which version of the content was written.
+
+    A save may carry a `tail`: an `(mmap, offset)` pair whose bytes from `offset` on are
+    copied after the content. This lets a partially loaded large file be saved from its
+    edited head without ever holding the untouched rest of the file in memory.
+    """
+
+    def __init__(self, on_written=None, on_failed=None):
+        self.on_written = on_written
+        self.on_failed = on_failed
+        self.pending = {}
+        self.busy = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, path, content, tail=None, token=None):
+        """
+        Queues the given content to be written to `path`, replacing any queued older content.
+
+        Args:
+            path (str): The file path to write.
+            content (str): The complete new file content, or its head if `tail` is given.
+            tail (tuple, optional): An `(mmap, offset)` pair providing the rest of the file.
+            token (optional): A value passed back to `on_written` or `on_failed`.
+        """
+        with self.condition:
+            self.pending[path] = (content, tail, token)
+            self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every queued save has been written.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds.
+
+        Returns:
+            bool: True if all saves were written, False if the timeout expired.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending and not self.busy, timeout)
+
+    def run(self):
+        """
+        Writes queued saves one at a time for the lifetime of the application.
+        """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending)
+                path, (content, tail, token) = self.pending.popitem()
+                self.busy = True
+            error = None
+            try:
+                self.write_atomic(path, content, tail)
+            except Exception as exc:
+                # Besides OSError, a tail mapping closed under the write raises ValueError
+                error = exc
+            try:
+                if error is not None:
+                    if self.on_failed is not None:
+                        self.on_failed(path, error, token)
+                elif self.on_written is not None:
+                    self.on_written(path, content if tail is None else None, token)
+            except Exception:
+                # A failing callback must not stop the writer thread
+                pass
+            finally:
+                content = tail = error = None
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    @staticmethod
+    def write_atomic(path, content, tail=None):
+        """
+        Writes a file through a temporary sibling file and `os.replace`.
+
+        The permissions of an existing file are carried over to the new one.
+
+        Args:
+            path (str): The file path to write.
+            content (str): The complete new file content, or its head if `tail` is given.
+            tail (tuple, optional): An `(mmap, offset)` pair whose remaining bytes are
+                copied after the content in blocks.
+        """
+        with profiler.span('readme.write'):
+            ReadmeWriter.write_file(path, content, tail)
+
+    @staticmethod
+    def write_file(path, content, tail):
+        """
+        Performs the write of `write_atomic`.
+        """
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                file.write(content)
+                if tail is not None:
+                    file.flush()
+                    source, offset = tail
+                    for start in range(offset, len(source), 1024 * 1024):
+                        file.buffer.write(source[start:start + 1024 * 1024])
+            try:
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+            except OSError:
+                pass
+            if profiler.enabled:
+                profiler.count('bytes_written', os.path.getsize(tmp_path))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+def hash_file(path, partial_size=0, chunk_size=1024 * 1024):
+    """
+    Returns the BLAKE2b digest of a file, reading it in chunks.
+
+    Lives at module level so that it can run in a process pool.
+
+    Args:
+        path (str): The file path.
+        partial_size (int): If set, only the first and the last `partial_size` bytes are hashed.
+        chunk_size (int): The number of bytes read at a time.
+
+    Returns:
+        str: The hex digest, or None if the file cannot be read.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, 'rb') as file:
+            if partial_size:
+                digest.update(file.read(partial_size))
+                size = os.fstat(file.fileno()).st_size
+                if size > 2 * partial_size:
+                    file.seek(size - partial_size)
+                digest.update(file.read(partial_size))
+            else:
+                for chunk in iter(lambda: file.read(chunk_size), b''):
+                    digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class DuplicateFinder:
+    """
+    Finds files with identical content below an opened root.
+
+    Candidates are narrowed down in three stages: files sharing a size, then files that
+    also share a hash of their first and last `partial_size` bytes, and finally files with
+    the same full hash. Only the last stage reads whole files. Both hashing stages run in a
+    process pool. Digests are stored in an SQLite file next to the `DirectoryIndex` cache,
+    keyed by `(inode, size, mtime_ns)`, so unchanged files are never hashed twice.
+    """
+
+    partial_size = 64 * 1024
+
+    def __init__(self, root_path, directory_index, cache_dir=None, workers=None):
+        self.root_path = os.path.normpath(os.path.abspath(root_path))
+        self.index = directory_index
+        self.workers = workers
+        self.db_path = cache_file(self.root_path, '.hashes.sqlite', cache_dir)
+
+        self.lock = threading.RLock()
+        self.closed = False
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                inode INTEGER,
+                size INTEGER,
+                mtime_ns INTEGER,
+                partial TEXT,
+                full TEXT,
+                PRIMARY KEY (inode, size, mtime_ns)
+            );
+        """)
+        self.db.commit()
+
+    def close(self):
+        """
+        Commits pending changes and closes the database connection.
+        """
+        with self.lock:
+            self.closed = True
+            self.db.commit()
+            self.db.close()
+
+    def cached(self, key):
+        """
+        Returns the stored `[partial, full]` digests of a file version, None where unknown.
+        """
+        with self.lock:
+            if self.closed:
+                return [None, None]
+            row = self.db.execute('SELECT partial, full FROM hashes WHERE inode = ? AND size = ? AND mtime_ns = ?',
+                                  key).fetchone()
+        return list(row) if row else [None, None]
+
+    def store(self, key, digests):
+        with self.lock:
+            if not self.closed:
+                self.db.execute('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)', (*key, *digests))
+
+    def create_pool(self):
+        """
+        Returns a new process pool for hashing.
+
+        Workers are spawned rather than forked, as forking a process that runs Tk and
+        several threads is not safe.
+        """
+        return concurrent.futures.ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def find(self, cancelled=None, progress=None, found=None):
+        """
+        Searches the whole root for duplicate files.
+
+        Args:
+            cancelled (callable, optional): Returns True when the search should be abandoned.
+            progress (callable, optional): Called with `(stage, done, total)` as work completes.
+            found (callable, optional): Called with `(size, paths)` for every group of
+                                        identical files as soon as it is confirmed.
+
+        Returns:
+            list: `(size, paths)` tuples, or None if the search was cancelled.
+        """
+        is_cancelled = lambda: self.closed or (cancelled is not None and cancelled())
+        report = progress or (lambda stage, done, total: None)
+        groups = []
+
+        def confirm(size, paths):
+            groups.append((size, paths))
+            if found is not None:
+                found(size, paths)
+
+        report('Scanning', 0, 0)
+        if self.index.totals(self.root_path, is_cancelled) is None:
+            return None
+
+        # Stage 1: files sharing a size; hard links to the same inode count only once
+        files = {}
+        for size, paths in self.index.same_size_files().items():
+            inodes = set()
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if (stat.st_dev, stat.st_ino) not in inodes:
+                    inodes.add((stat.st_dev, stat.st_ino))
+                    key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+                    files[path] = (key, self.cached(key))
+        executor = None
+        try:
+            # Stage 2: hash of head and tail
+            pending = [path for path, (key, digests) in files.items() if digests[0] is None]
+            if pending:
+                executor = self.create_pool()
+                partial_hash = functools.partial(hash_file, partial_size=self.partial_size)
+                for done, (path, digest) in enumerate(
+                        zip(pending, executor.map(partial_hash, pending, chunksize=16)), 1):
+                    if is_cancelled():
+                        return None
+                    key, digests = files[path]
+                    digests[0] = digest
+                    self.store(key, digests)
+                    report('Comparing file heads and tails', done, len(pending))
+
+            candidates = collections.defaultdict(list)
+            for path, (key, digests) in files.items():
+                if digests[0] is not None:
+                    candidates[(key[1], digests[0])].append(path)
+            candidates = {group: paths for group, paths in candidates.items() if len(paths) > 1}
+
+            # Stage 3: full hash, except for files that the partial hash already covered
+            remaining = {}
+            futures = {}
+            for (size, partial), paths in candidates.items():
+                if size <= 2 * self.partial_size:
+                    confirm(size, sorted(paths))
+                    continue
+                remaining[(size, partial)] = len(paths)
+                for path in paths:
+                    if files[path][1][1] is None:
+                        if executor is None:
+                            executor = self.create_pool()
+                        futures[executor.submit(hash_file, path)] = path
+                    else:
+                        remaining[(size, partial)] -= 1
+
+            def settle(group):
+                by_digest = collections.defaultdict(list)
+                for path in candidates[group]:
+                    if files[path][1][1] is not None:
+                        by_digest[files[path][1][1]].append(path)
+                for paths in by_digest.values():
+                    if len(paths) > 1:
+                        confirm(group[0], sorted(paths))
+
+            for group, count in remaining.items():
+                if count == 0:
+                    settle(group)
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                if is_cancelled():
+                    return None
+                path = futures[future]
+                key, digests = files[path]
+                digests[1] = future.result()
+                self.store(key, digests)
+                group = (key[1], digests[0])
+                remaining[group] -= 1
+                if remaining[group] == 0:
+                    settle(group)
+                report('Hashing candidates', done, len(futures))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            with self.lock:
+                if not self.closed:
+                    self.db.commit()
+        return groups
+
+
+class FilePreviewer:
+    """
+    Generates previews of files and keeps them in a memory cache with a size budget.
+
+    A preview is a dict with the file's `size` and `mtime_ns` and a `kind`: 'text' with the
+    decoded first `text_bytes` bytes, 'image' with a PNG thumbnail of at most
+    `thumbnail_size` pixels and the source dimensions, or 'binary' with the first bytes
+    of the file. Previews are cached by `(path, size, mtime_ns)` in least recently used
+    order until their estimated memory exceeds `max_bytes`. Thumbnails are also written to
+    the user's cache directory, so they survive restarts. PIL is imported only when an
+    image has to be thumbnailed; without it, images are previewed as binaries.
+
+    All methods are safe to call from several threads.
+    """
+
+    IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tif', '.tiff', '.webp'}
+
+    def __init__(self, cache_dir=None, max_bytes=64 * 1024 * 1024, text_bytes=16 * 1024, thumbnail_size=256):
+        self.cache_dir = cache_directory(cache_dir, 'thumbnails')
+        self.max_bytes = max_bytes
+        self.text_bytes = text_bytes
+        self.thumbnail_size = thumbnail_size
+        self.lock = threading.Lock()
+        self.previews = collections.OrderedDict()
+        self.cached_bytes = 0
+
+    @staticmethod
+    def key(path):
+        """
+        Returns the cache key of the current version of a file, or None if it cannot be read.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (path, stat.st_size, stat.st_mtime_ns)
+
+    def cached(self, path):
+        """
+        Returns the cached preview of the current version of a file, or None.
+        """
+        key = self.key(path)
+        with self.lock:
+            entry = self.previews.get(key)
+            if entry is None:
+                return None
+            self.previews.move_to_end(key)
+        return entry[0]
+
+    def generate(self, path):
+        """
+        Returns the preview of a file, generating it unless it is cached.
+
+        Args:
+            path (str): The file path.
+
+        Returns:
+            dict: The preview, or None if the file cannot be read.
+        """
+        key = self.key(path)
+        if key is None:
+            return None
+        with self.lock:
+            entry = self.previews.get(key)
+        if entry is not None:
+            return entry[0]
+
+        with profiler.span('preview.generate'):
+            preview = None
+            if os.path.splitext(path)[1].lower() in self.IMAGE_EXTENSIONS:
+                preview = self.image_preview(key)
+            if preview is None:
+                preview = self.content_preview(path)
+        if preview is None:
+            return None
+        preview.update(size=key[1], mtime_ns=key[2])
+        cost = len(preview.get('png', b'')) + len(preview.get('text', '')) + len(preview.get('head', b'')) + 256
+        with self.lock:
+            if key not in self.previews:
+                self.previews[key] = (preview, cost)
+                self.cached_bytes += cost
+            while self.cached_bytes > self.max_bytes and len(self.previews) > 1:
+                self.cached_bytes -= self.previews.popitem(last=False)[1][1]
+        return preview
+
+    def content_preview(self, path):
+        """
+        Returns a 'text' preview of the start of a file, or a 'binary' one if it is not text.
+        """
+        try:
+            with open(path, 'rb') as file:
+                head = file.read(self.text_bytes)
+        except OSError:
+            return None
+        profiler.count('bytes_read', len(head))
+        if b'\0' not in head:
+            try:
+                # Not final, so a multi-byte character cut off at the end of the window is dropped
+                return {'kind': 'text', 'text': codecs.getincrementaldecoder('utf-8')().decode(head)}
+            except UnicodeDecodeError:
+                pass
+        return {'kind': 'binary', 'head': head[:64]}
+
+    def image_preview(self, key):
+        """
+        Returns an 'image' preview with a PNG thumbnail, from the disk cache if possible.
+
+        JPEG files are decoded at a reduced scale through `draft`, so large photos never
+        have to be decoded in full.
+        """
+        path, size, mtime_ns = key
+        digest = hashlib.sha1(f'{path}:{size}:{mtime_ns}:{self.thumbnail_size}'.encode('utf-8')).hexdigest()
+        cache_path = os.path.join(self.cache_dir, digest + '.png')
+        try:
+            with open(cache_path, 'rb') as file:
+                png = file.read()
+            # The source dimensions are kept in a 'source' tEXt chunk of the thumbnail
+            start = png.index(b'tEXtsource\0')
+            length = struct.unpack('>I', png[start - 4:start])[0]
+            width, height, image_format = json.loads(png[start + 11:start + 4 + length])
+            return {'kind': 'image', 'png': png, 'width': width, 'height': height, 'format': image_format}
+        except (OSError, ValueError, struct.error):
+            pass
+
+        try:
+            from PIL import Image, PngImagePlugin
+        except ImportError:
+            return None
+        try:
+            with Image.open(path) as image:
+                width, height, image_format = image.width, image.height, image.format
+                image.draft('RGB', (self.thumbnail_size, self.thumbnail_size))
+                image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+                if image.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+                    image = image.convert('RGBA')
+                info = PngImagePlugin.PngInfo()
+                info.add_text('source', json.dumps([width, height, image_format]))
+                buffer = io.BytesIO()
+                image.save(buffer, 'PNG', pnginfo=info)
+        except Exception:
+            # PIL raises a wide range of errors for truncated or unsupported images
+            return None
+        png = buffer.getvalue()
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                file.write(png)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+        return {'kind': 'image', 'png': png, 'width': width, 'height': height, 'format': image_format}
+
+
+class ExplorerModel:
+    """
+    Headless model of an opened root folder, consumed by the Tk view.
+
+    Bundles the persistent `DirectoryIndex`, `ReadmeIndex` and `DuplicateFinder` with the
+    in-memory `FilenameIndex` and provides the scanning, size aggregation and README operations
+    the explorer needs, without depending on a display. All methods may be called from
+    worker threads.
+    """
+
+    def __init__(self, root_path, cache_dir=None):
+        self.root_path = os.path.normpath(os.path.abspath(root_path))
+        self.index = DirectoryIndex(self.root_path, cache_dir)
+        self.readme_index = ReadmeIndex(self.root_path, cache_dir)
+        self.filename_index = FilenameIndex()
+        self.duplicate_finder = DuplicateFinder(self.root_path, self.index, cache_dir)
+        self.closed = False
+
+    def close(self):
+        """
+        Closes the persistent indexes. Background work on this model stops soon after.
+        """
+        self.closed = True
+        self.index.close()
+        self.readme_index.close()
+        self.duplicate_finder.close()
+
+    def list_dir(self, path):
+        """
+        Returns the entries of a directory, folders first and in natural order.
+
+        Args:
+            path (str): The directory path.
+
+        Returns:
+            list: `(name, is_dir, is_link, size)` tuples; empty if the directory cannot be read.
+        """
+        return sort_entries(self.index.scan(path) or [])
+
+    def counts(self, path):
+        """
+        Returns the number of files and of directories directly within a directory.
+
+        Args:
+            path (str): The directory path.
+
+        Returns:
+            tuple: `(num_files, num_dirs)`.
+        """
+        entries = self.index.scan(path) or []
+        num_dirs = sum(1 for entry in entries if entry[1])
+        return len(entries) - num_dirs, num_dirs
+
+    def cached_counts(self, path):
+        """
+        Returns the last known `(num_files, num_dirs)` of a directory, or None if unknown.
+        """
+        return self.index.cached_counts(path)
+
+    def cached_size(self, path):
+        """
+        Returns the last known total size of a directory in bytes, or None if unknown.
+        """
+        totals = self.index.cached_totals(path)
+        return totals[0] if totals else None
+
+    def folder_size(self, path, cancelled=None, progress=None):
+        """
+        Computes the total size of all files below a directory.
+
+        Args:
+            path (str): The directory path.
+            cancelled (callable, optional): Returns True when the walk should be abandoned.
+            progress (callable, optional): Called with the running size total in bytes.
+
+        Returns:
+            int: The total size in bytes, or None if the walk was cancelled.
+        """
+        totals = self.index.totals(path, cancelled, progress)
+        return None if totals is None else totals[0]
+
+    def cached_analytics(self, path):
+        """
+        Returns the stored `FolderAnalytics` of a directory, or None if unknown or outdated.
+        """
+        return self.index.cached_analytics(path)
+
+    def folder_analytics(self, path, cancelled=None, progress=None):
+        """
+        Computes the size, type, age, depth and fan-out summary of a directory in one walk.
+
+        Args:
+            path (str): The directory path.
+            cancelled (callable, optional): Returns True when the walk should be abandoned.
+            progress (callable, optional): Called with the running size total in bytes.
+
+        Returns:
+            FolderAnalytics: The summary, or None if the walk was cancelled.
+        """
+        return self.index.analyze(path, cancelled, progress)
+
+    def find_duplicates(self, cancelled=None, progress=None, found=None):
+        """
+        Searches the root for files with identical content, see `DuplicateFinder.find`.
+        """
+        return self.duplicate_finder.find(cancelled, progress, found)
+
+    def build_search_indexes(self, cancelled=None):
+        """
+        Fills the `FilenameIndex` and refreshes the `ReadmeIndex` with the README.md files found.
+
+        Args:
+            cancelled (callable, optional): Returns True when the build should be abandoned.
+        """
+        is_cancelled = lambda: self.closed or (cancelled is not None and cancelled())
+        filename_index = self.filename_index
+        filename_index.build(self.root_path, self.index, is_cancelled)
+        if is_cancelled():
+            return
+        readme_paths = [filename_index.path(entry_id) for entry_id, name in enumerate(filename_index.names)
+                        if name == 'README.md' and not filename_index.is_dir[entry_id]]
+        self.readme_index.refresh(readme_paths, is_cancelled)
+
+    def apply_changes(self, dirty, renames):
+        """
+        Brings the indexes up to date with a batch of changes reported by a `DirectoryWatcher`.
+
+        Args:
+            dirty (set): Paths of directories whose direct contents changed.
+            renames (list): `(old_path, new_path)` pairs.
+
+        Returns:
+            dict: Maps each dirty directory to its fresh entries, sorted like `list_dir`, or to
+                  None if it cannot be read.
+        """
+        for old_path, new_path in renames:
+            self.filename_index.rename_dir(old_path, new_path)
+            self.readme_index.rename_dir(old_path, new_path)
+        listings = {}
+        for path in dirty:
+            self.index.invalidate(path)
+            listings[path] = self.index.scan(path)
+            if listings[path] is None:
+                self.readme_index.remove(os.path.join(path, 'README.md'))
+                self.readme_index.remove_below(path)
+            else:
+                self.readme_index.remove_below(
+                    path, [name for name, is_dir, is_link, size in listings[path] if is_dir and not is_link])
+                self.filename_index.update_dir(path, listings[path])
+                if any(name == 'README.md' for name, is_dir, is_link, size in listings[path]):
+                    self.readme_index.update(os.path.join(path, 'README.md'))
+                else:
+                    self.readme_index.remove(os.path.join(path, 'README.md'))
+                listings[path] = sort_entries(listings[path])
+        return listings
+
+    @staticmethod
+    def find_readme(path):
+        """
+        Finds or creates a README.md file in the specified directory.
+
+        Args:
+            path (str): The directory path where to look for or create the README.md file.
+
+        Returns:
+            str: The path to the README.md file.
+
+        If the README.md file does not exist in the specified directory, it will be created
+        with a default template.
+        """
+        readme_path = os.path.join(path, 'README.md')
+        if os.path.exists(readme_path):
+            return readme_path
+        else:
+            with open(readme_path, "w") as readme:
+                readme.write("# This is a new README file.")
+                # add template for perfect README.md
+        return readme_path
+
+    @staticmethod
+    def read_readme(readme_path):
+        """
+        Returns the content of a README file.
+        """
+        with profiler.span('readme.read'), open(readme_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+        profiler.count('bytes_read', len(content))
+        return content
+
+    def save_readme(self, readme_path, content):
+        """
+        Saves a README file atomically and re-indexes it.
+
+        Args:
+            readme_path (str): The README file path.
+            content (str): The new content.
+        """
+        ReadmeWriter.write_atomic(readme_path, content)
+        self.readme_written(readme_path, content)
+
+    def readme_written(self, readme_path, content):
+        """
+        Re-indexes a README that was just written, if it lies below the root.
+
+        Args:
+            readme_path (str): The README file path.
+            content (str): The written content, or None to read it back from disk.
+        """
+        if not self.closed and readme_path.startswith(self.root_path + os.sep):
+            self.readme_index.update(readme_path, content)
@@ -0,0 +1,272 @@
+"""
+Tests for the headless explorer model.
+"""
+import mmap
+import os
+import shutil
+
+import pytest
+
+from explorer_model import (DirectoryIndex, DuplicateFinder, ExplorerModel, FilenameIndex, ReadmeIndex, ReadmeWriter,
+                            sort_entries)
+
+
+def write(path, content):
+    """
+    Writes a file, creating its parent directories.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb' if isinstance(content, bytes) else 'w') as file:
+        file.write(content)
+
+
+def touch_dir(path):
+    """
+    Moves a directory's mtime forward, so that coarse timestamps cannot hide a change.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def walk_totals(root):
+    """
+    Returns the size, file count, directory count and file depths below a folder via `os.walk`.
+    """
+    size = files = dirs = 0
+    depths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirs += len(dirnames)
+        relative = os.path.relpath(dirpath, root)
+        depth = 1 if relative == '.' else relative.count(os.sep) + 2
+        for name in filenames:
+            if name != '.DS_Store':
+                size += os.path.getsize(os.path.join(dirpath, name))
+                files += 1
+                depths.append(depth)
+    return size, files, dirs, depths
+
+
+@pytest.fixture
+def root(tmp_path):
+    path = tmp_path / 'root'
+    write(str(path / 'top.txt'), 'x' * 5)
+    write(str(path / 'a' / 'file2.py'), 'x' * 20)
+    write(str(path / 'a' / 'b' / 'file1.md'), 'x' * 10)
+    write(str(path / 'a' / 'b' / 'c' / 'deep.bin'), b'\0' * 300)
+    write(str(path / 'empty' / '.DS_Store'), 'ignored')
+    return str(path)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+def test_sort_entries_orders_folders_first_and_numbers_naturally():
+    entries = [('file10', 0, 0, 0), ('x1\u00b2', 0, 0, 0), ('File2', 0, 0, 0), ('zdir', 1, 0, 0),
+               ('file\u0661', 0, 0, 0)]
+    assert [name for name, is_dir, is_link, size in sort_entries(entries)] == [
+        'zdir', 'file\u0661', 'File2', 'file10', 'x1\u00b2']
+
+
+def test_directory_index_rolls_up_added_files(root, cache_dir):
+    index = DirectoryIndex(root, cache_dir)
+    assert index.totals(root) == (335, 4, 4)
+
+    write(os.path.join(root, 'a', 'b', 'new.txt'), 'x' * 7)
+    touch_dir(os.path.join(root, 'a', 'b'))
+    index.scan(os.path.join(root, 'a', 'b'))
+
+    assert tuple(index.cached_totals(root)) == (342, 5, 4)
+    assert tuple(index.cached_totals(os.path.join(root, 'a'))) == (337, 4, 2)
+    assert index.cached_analytics(root) is None
+    assert index.cached_analytics(os.path.join(root, 'empty')) is not None
+    index.close()
+
+
+def test_directory_index_forgets_removed_folders(root, cache_dir):
+    index = DirectoryIndex(root, cache_dir)
+    index.totals(root)
+
+    shutil.rmtree(os.path.join(root, 'a', 'b'))
+    touch_dir(os.path.join(root, 'a'))
+    index.scan(os.path.join(root, 'a'))
+
+    assert tuple(index.cached_totals(root)) == (25, 2, 2)
+    assert index.cached_totals(os.path.join(root, 'a', 'b')) is None
+    assert index.cached_totals(os.path.join(root, 'a', 'b', 'c')) is None
+    assert index.totals(root) == walk_totals(root)[:3]
+    index.close()
+
+
+def test_analyze_matches_os_walk(root, cache_dir):
+    for number in range(30):
+        write(os.path.join(root, f'dir{number % 4}', f'sub{number % 3}', f'file{number}.dat'), 'y' * number)
+    size, files, dirs, depths = walk_totals(root)
+
+    index = DirectoryIndex(root, cache_dir)
+    analytics = index.analyze(root)
+    assert (analytics.size, analytics.files, analytics.dirs) == (size, files, dirs)
+    assert analytics.max_depth == max(depths)
+    assert analytics.depth_sum == sum(depths)
+    assert analytics.largest_files()[0] == (300, os.path.join('a', 'b', 'c', 'deep.bin'))
+    assert sum(count for extension, ext_size, count in analytics.by_extension()) == files
+
+    # A second walk reuses the stored summaries and agrees with the first
+    cached = index.analyze(root)
+    assert cached.to_json() == analytics.to_json()
+    index.close()
+
+
+def test_flat_folder_depth(tmp_path, cache_dir):
+    flat = str(tmp_path / 'flat')
+    write(os.path.join(flat, 'one.txt'), 'x')
+    write(os.path.join(flat, 'two.txt'), 'x')
+    index = DirectoryIndex(flat, cache_dir)
+    analytics = index.analyze(flat)
+    assert analytics.max_depth == 1
+    assert analytics.depth_sum / analytics.files == 1
+    index.close()
+
+
+def test_filename_index_search_rename_and_remove(root, cache_dir):
+    directory_index = DirectoryIndex(root, cache_dir)
+    names = FilenameIndex()
+    names.build(root, directory_index)
+    paths = lambda query: sorted(names.path(entry_id) for entry_id in names.search(query))
+
+    assert paths('FILE') == [os.path.join(root, 'a', 'b', 'file1.md'), os.path.join(root, 'a', 'file2.py')]
+    assert paths('e2') == [os.path.join(root, 'a', 'file2.py')]
+
+    renamed = os.path.join(root, 'renamed')
+    names.rename_dir(os.path.join(root, 'a'), renamed)
+    assert paths('deep') == [os.path.join(renamed, 'b', 'c', 'deep.bin')]
+
+    with names.lock:
+        names.remove(renamed, 'b')
+    assert paths('file') == [os.path.join(renamed, 'file2.py')]
+    assert paths('deep') == []
+
+    names.update_dir(root, [('top.txt', 0, 0, 5), ('added.txt', 0, 0, 1)])
+    assert paths('.txt') == [os.path.join(root, 'added.txt'), os.path.join(root, 'top.txt')]
+    directory_index.close()
+
+
+def test_readme_index_ranks_with_bm25_and_matches_last_word_as_prefix(tmp_path, cache_dir):
+    root = str(tmp_path / 'docs')
+    readmes = {
+        'parser': 'The parser reads files. The parser is fast, the parser is small.',
+        'mention': 'A tool that mentions a parser once among many other words of text.',
+        'other': 'Apples and pears.',
+    }
+    index = ReadmeIndex(root, cache_dir)
+    for name, content in readmes.items():
+        path = os.path.join(root, name, 'README.md')
+        write(path, content)
+        assert index.update(path)
+    readme = lambda name: os.path.join(root, name, 'README.md')
+
+    assert [path for path, score in index.search('parser')] == [readme('parser'), readme('mention')]
+    assert [path for path, score in index.search('pars')] == [readme('parser'), readme('mention')]
+    assert [path for path, score in index.search('pars fast')] == [readme('parser')]
+    assert [path for path, score in index.search('app')] == [readme('other')]
+
+    # Unchanged files are not indexed again; removed ones drop out of the results
+    assert not index.update(readme('parser'))
+    index.remove(readme('parser'))
+    assert [path for path, score in index.search('parser')] == [readme('mention')]
+    index.close()
+
+
+def test_apply_changes_follows_renamed_and_removed_readme_folders(tmp_path, cache_dir):
+    root = str(tmp_path / 'project')
+    write(os.path.join(root, 'a', 'c', 'README.md'), 'The parser lives here.')
+    write(os.path.join(root, 'a', 'c', 'sub', 'README.md'), 'A parser plugin.')
+    write(os.path.join(root, 'b', 'README.md'), 'Unrelated notes.')
+    model = ExplorerModel(root, cache_dir)
+    model.build_search_indexes()
+    found = lambda query: sorted(path for path, score in model.readme_index.search(query))
+
+    os.rename(os.path.join(root, 'a', 'c'), os.path.join(root, 'a', 'd'))
+    model.apply_changes({os.path.join(root, 'a')}, [(os.path.join(root, 'a', 'c'), os.path.join(root, 'a', 'd'))])
+    assert found('parser') == [os.path.join(root, 'a', 'd', 'README.md'),
+                               os.path.join(root, 'a', 'd', 'sub', 'README.md')]
+
+    shutil.rmtree(os.path.join(root, 'a', 'd'))
+    model.apply_changes({os.path.join(root, 'a')}, [])
+    assert found('parser') == []
+
+    shutil.rmtree(os.path.join(root, 'b'))
+    model.apply_changes({os.path.join(root, 'b')}, [])
+    assert found('notes') == []
+    model.close()
+
+
+def test_duplicate_finder_stages_and_cache(tmp_path, cache_dir, monkeypatch):
+    root = str(tmp_path / 'dups')
+    large = os.urandom(300 * 1024)
+    different = bytearray(large)
+    different[150 * 1024] ^= 0xff
+    write(os.path.join(root, 'small', 'one.txt'), 'same small content')
+    write(os.path.join(root, 'small', 'two.txt'), 'same small content')
+    write(os.path.join(root, 'small', 'size_only.txt'), 'diff small content')
+    write(os.path.join(root, 'large', 'first.bin'), large)
+    write(os.path.join(root, 'large', 'second.bin'), large)
+    write(os.path.join(root, 'large', 'middle_differs.bin'), bytes(different))
+
+    index = DirectoryIndex(root, cache_dir)
+    finder = DuplicateFinder(root, index, cache_dir, workers=2)
+    stages = []
+    groups = finder.find(progress=lambda stage, done, total: stages.append(stage))
+    expected = [
+        (18, [os.path.join(root, 'small', 'one.txt'), os.path.join(root, 'small', 'two.txt')]),
+        (len(large), [os.path.join(root, 'large', 'first.bin'), os.path.join(root, 'large', 'second.bin')]),
+    ]
+    assert sorted(groups) == expected
+    assert stages[0] == 'Scanning'
+    assert 'Comparing file heads and tails' in stages
+    assert stages[-1] == 'Hashing candidates'
+
+    # Every digest is cached, so a second search hashes nothing
+    def no_pool():
+        raise AssertionError('unchanged files were hashed again')
+    monkeypatch.setattr(finder, 'create_pool', no_pool)
+    assert sorted(finder.find()) == expected
+    finder.close()
+    index.close()
+
+
+def test_write_atomic_copies_the_mmap_tail(tmp_path):
+    path = str(tmp_path / 'README.md')
+    original = b'# Head\n' + b''.join(b'line %d\n' % number for number in range(100000))
+    write(path, original)
+    os.chmod(path, 0o640)
+    offset = 1000
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+        ReadmeWriter.write_atomic(path, '# New head ✓\n', (mapping, offset))
+        with open(path, 'rb') as written:
+            assert written.read() == '# New head ✓\n'.encode('utf-8') + original[offset:]
+
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(str(tmp_path)) == ['README.md']
+
+
+def test_readme_writer_survives_a_closed_tail_mapping(tmp_path):
+    path = str(tmp_path / 'README.md')
+    write(path, '# Head\nbody\n')
+    results = []
+    writer = ReadmeWriter(on_written=lambda *args: results.append(('written',) + args),
+                          on_failed=lambda path, error, token: results.append(('failed', path, type(error), token)))
+    with open(path, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    mapping.close()
+
+    writer.submit(path, '# New\n', (mapping, 7), token=1)
+    assert writer.flush(timeout=5)
+    writer.submit(path, '# Newer\n', token=2)
+    assert writer.flush(timeout=5)
+
+    assert results == [('failed', path, ValueError, 1), ('written', path, '# Newer\n', 2)]
+    with open(path) as file:
+        assert file.read() == '# Newer\n'